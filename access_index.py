@@ -0,0 +1,156 @@
+"""
+Access Index
+============
+
+In-memory index voor toegangsbeslissingen bij een join.
+Wordt bij het opstarten uit de database gevuld en daarna incrementeel
+bijgewerkt, zodat een access check alleen nog dictionary lookups kost.
+"""
+
+import asyncio
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AccessIndex:
+    """
+    Index van game accounts, Discord levels en server requirements
+    """
+
+    def __init__(self, db, max_age: float = None):
+        self.db = db
+        # Na deze tijd (seconden) wordt een account entry als verouderd
+        # gezien en opnieuw uit de database gehaald
+        self.max_age = max_age or float(os.getenv('ACCESS_INDEX_MAX_AGE', 3600))
+        # Server requirements worden periodiek opnieuw gelezen, zodat wijzigingen
+        # in de servers tabel (bijv. via setup.py) zonder herstart doorkomen.
+        # Levels houdt de LevelSynchronizer zelf bij.
+        self.server_refresh = float(os.getenv('ACCESS_INDEX_SERVER_REFRESH', 60))
+
+        self.accounts = {}        # (game_type, game_username) -> (discord_id, geladen op)
+        self.user_accounts = {}   # discord_id -> {game_type: game_username}
+        self.levels = {}          # discord_id -> current_level
+        self.server_levels = {}   # server_name -> required_level
+        self._task = None
+
+    async def load(self):
+        """
+        Bouw de volledige index op uit de database
+        """
+        account_rows = await self.db.fetchall(
+            """SELECT ga.game_type, ga.game_username, ga.discord_id
+               FROM game_accounts ga
+               JOIN users u ON u.discord_id = ga.discord_id"""
+        )
+        level_rows = await self.db.fetchall("SELECT discord_id, current_level FROM discord_levels")
+
+        now = time.monotonic()
+        accounts = {}
+        user_accounts = {}
+        for game_type, game_username, discord_id in account_rows:
+            accounts[(game_type, game_username)] = (discord_id, now)
+            user_accounts.setdefault(discord_id, {})[game_type] = game_username
+
+        self.accounts = accounts
+        self.user_accounts = user_accounts
+        self.levels = {discord_id: level for discord_id, level in level_rows if level is not None}
+        await self.load_servers()
+
+        logger.info(
+            f"Access index geladen: {len(self.accounts)} accounts, "
+            f"{len(self.levels)} levels, {len(self.server_levels)} servers"
+        )
+
+    def start(self):
+        """
+        Start het periodiek herladen van de server requirements
+        """
+        if self._task is None and self.server_refresh > 0:
+            self._task = asyncio.create_task(self._run(), name="access-index-servers")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.server_refresh)
+            try:
+                await self.load_servers()
+            except Exception as e:
+                logger.error(f"Error reloading server requirements: {e}")
+
+    async def load_servers(self):
+        """
+        Herlaad de required_level per server
+        """
+        rows = await self.db.fetchall("SELECT server_name, required_level FROM servers")
+        self.server_levels = {name: level for name, level in rows if level is not None}
+
+    def lookup(self, server_name: str, player_name: str, game_type: str):
+        """
+        Bepaal toegang uit het geheugen
+
+        Geeft True/False terug, of None als de entry ontbreekt of verouderd
+        is en de caller moet terugvallen op SQL.
+        """
+        required_level = self.server_levels.get(server_name)
+        if required_level is None:
+            return None
+
+        entry = self.accounts.get((game_type, player_name))
+        if entry is None:
+            return None
+
+        discord_id, loaded_at = entry
+        if time.monotonic() - loaded_at > self.max_age:
+            return None
+
+        return self.levels.get(discord_id, 0) >= required_level
+
+    def remember(self, server_name: str, player_name: str, game_type: str,
+                 discord_id: str, current_level: int, required_level: int):
+        """
+        Werk de index bij met het resultaat van een SQL fallback
+        """
+        self.set_account(game_type, player_name, discord_id)
+        self.set_level(discord_id, current_level)
+        self.set_server(server_name, required_level)
+
+    def set_account(self, game_type: str, game_username: str, discord_id: str):
+        """
+        Registreer (of vervang) het game account van een gebruiker
+        """
+        # Een gebruiker heeft maximaal een account per game
+        games = self.user_accounts.setdefault(discord_id, {})
+        previous = games.get(game_type)
+        if previous is not None and previous != game_username:
+            self.accounts.pop((game_type, previous), None)
+
+        self.accounts[(game_type, game_username)] = (discord_id, time.monotonic())
+        games[game_type] = game_username
+
+    def usernames(self, discord_id: str):
+        """
+        Game usernames van een gebruiker, over alle games
+        """
+        return list(self.user_accounts.get(discord_id, {}).values())
+
+    def set_level(self, discord_id: str, current_level: int):
+        """
+        Werk het Discord level van een gebruiker bij
+        """
+        self.levels[discord_id] = current_level or 0
+
+    def set_server(self, server_name: str, required_level: int):
+        """
+        Werk het vereiste level van een server bij
+        """
+        if required_level is None:
+            self.server_levels.pop(server_name, None)
+        else:
+            self.server_levels[server_name] = required_level
@@ -0,0 +1,407 @@
+"""
+Account Import & Export
+======================
+
+Bulk import van gekoppelde game accounts in de users en game_accounts
+tabellen, bijvoorbeeld bij een migratie van een andere bot of een
+bestaande whitelist. Records worden per batch met executemany
+weggeschreven, elke batch in een eigen transactie. Records die botsen met
+bestaande koppelingen worden overgeslagen en gerapporteerd.
+
+Ondersteunde formaten:
+    csv        kolommen discord_id, game_username, optioneel discord_username en game_type
+    json       lijst van objecten met dezelfde velden (ook JSON lines, .jsonl)
+    whitelist  Minecraft whitelist.json; uuid/naam -> Discord ID komt uit --links
+               (CSV met discord_id en uuid of name, of DiscordSRV accounts.aof)
+
+De export streamt alle koppelingen naar CSV of JSON lines, zonder de hele
+tabel in het geheugen te laden. Een export kan weer geimporteerd worden.
+
+Gebruik:
+    python account_import.py import accounts.csv --game minecraft
+    python account_import.py import whitelist.json --links accounts.aof --conflicts conflicts.csv
+    python account_import.py export accounts.jsonl
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import logging
+
+from database import DatabasePool
+
+logger = logging.getLogger(__name__)
+
+# Namen waaronder velden in exports van andere bots voorkomen
+FIELD_ALIASES = {
+    'discord_id': ('discord_id', 'discordid', 'discord', 'user_id'),
+    'discord_username': ('discord_username', 'discord_name', 'discord_tag'),
+    'game_type': ('game_type', 'game'),
+    'game_username': ('game_username', 'username', 'name', 'player', 'player_name'),
+}
+
+EXPORT_COLUMNS = ('discord_id', 'discord_username', 'game_type', 'game_username', 'verified', 'created_at')
+
+def detect_format(path: str) -> str:
+    """
+    Bepaal het formaat uit de bestandsnaam
+    """
+    name = os.path.basename(path).lower()
+    if name == 'whitelist.json':
+        return 'whitelist'
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith('.jsonl'):
+        return 'jsonl'
+    return 'json'
+
+def _normalize(raw: dict, game_type: str = None) -> dict:
+    """
+    Zet een record met willekeurige veldnamen om naar de velden van de database
+    """
+    lowered = {str(key).strip().lower(): value for key, value in raw.items()}
+    record = {}
+    for field, aliases in FIELD_ALIASES.items():
+        value = None
+        for alias in aliases:
+            if lowered.get(alias) not in (None, ''):
+                value = str(lowered[alias]).strip()
+                break
+        record[field] = value
+    record['game_type'] = (record['game_type'] or game_type or '').lower() or None
+    return record
+
+def read_links(path: str) -> dict:
+    """
+    Lees een koppeling van Minecraft uuid of naam naar Discord ID
+
+    CSV met een discord_id kolom en een uuid en/of name kolom, of een
+    DiscordSRV accounts.aof met regels "<discord_id> <uuid>".
+    """
+    links = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.DictReader(f):
+                row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+                discord_id = row.get('discord_id')
+                if not discord_id:
+                    continue
+                for key in ('uuid', 'name', 'game_username'):
+                    if row.get(key):
+                        links[row[key].lower()] = discord_id
+        else:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    links[parts[1].lower()] = parts[0]
+    return links
+
+def read_records(path: str, fmt: str = None, game_type: str = None, links: dict = None):
+    """
+    Lees records uit een bestand als (regelnummer of index, record)
+
+    CSV en JSON lines worden regel voor regel gelezen, JSON en whitelist
+    bestanden in een keer.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            # Regel 1 is de header
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, _normalize(row, game_type)
+        elif fmt == 'jsonl':
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, _normalize(json.loads(line), game_type)
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get('accounts', [])
+            for index, item in enumerate(data):
+                if fmt == 'whitelist':
+                    yield index, _whitelist_record(item, links or {})
+                else:
+                    yield index, _normalize(item, game_type)
+
+def _whitelist_record(item: dict, links: dict) -> dict:
+    name = (item.get('name') or '').strip()
+    uuid = (item.get('uuid') or '').strip().lower()
+    discord_id = links.get(uuid) or links.get(uuid.replace('-', '')) or links.get(name.lower())
+    return {'discord_id': discord_id, 'discord_username': None,
+            'game_type': 'minecraft', 'game_username': name or None}
+
+class AccountImporter:
+    """
+    Laadt records per batch in users en game_accounts, met conflict rapportage
+    """
+
+    USER_SQL = "INSERT OR IGNORE INTO users (discord_id, discord_username) VALUES (?, ?)"
+
+    ACCOUNT_SQL = """INSERT INTO game_accounts (discord_id, game_type, game_username)
+                     VALUES (?, ?, ?)
+                     ON CONFLICT(discord_id, game_type) DO UPDATE SET
+                         game_username = excluded.game_username,
+                         -- Een nieuwe username is nog niet geverifieerd
+                         verified = CASE WHEN game_accounts.game_username = excluded.game_username
+                                         THEN game_accounts.verified ELSE FALSE END"""
+
+    def __init__(self, db: DatabasePool, batch_size: int = None, replace: bool = False, dry_run: bool = False):
+        self.db = db
+        # Blijft onder de 999 parameters van oudere SQLite versies in de IN (...) lookups
+        self.batch_size = min(batch_size or int(os.getenv('IMPORT_BATCH_SIZE', 500)), 900)
+        self.replace = replace
+        self.dry_run = dry_run
+
+        self.stats = {'read': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0,
+                      'conflicts': 0, 'batches': 0, 'failed_batches': 0}
+        self.conflicts = []   # (regel, record, reden)
+        self.linked = {}      # (discord_id, game_type) -> game_username uit deze import
+        self.claimed = {}     # (game_type, game_username) -> discord_id uit deze import
+
+    async def import_records(self, records) -> dict:
+        """
+        Importeer (regel, record) paren en geef de statistieken terug
+        """
+        batch = []
+        for item in records:
+            self.stats['read'] += 1
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch)
+                batch = []
+        if batch:
+            await self._import_batch(batch)
+        return self.stats
+
+    def _conflict(self, line, record: dict, reason: str):
+        self.stats['conflicts'] += 1
+        self.conflicts.append((line, record, reason))
+
+    async def _import_batch(self, batch: list):
+        """
+        Controleer en schrijf een batch in een transactie
+        """
+        valid = []
+        for line, record in batch:
+            missing = [field for field in ('discord_id', 'game_type', 'game_username') if not record.get(field)]
+            if missing:
+                self._conflict(line, record, f"ontbrekende velden: {', '.join(missing)}")
+            else:
+                valid.append((line, record))
+        if not valid:
+            return
+
+        self.stats['batches'] += 1
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        conflicts = []
+        made = []
+        try:
+            async with self.db.writer() as db:
+                current, owners = await self._existing(db, valid)
+
+                users = {}
+                accounts = []
+                for line, record in valid:
+                    discord_id = record['discord_id']
+                    game_type = record['game_type']
+                    game_username = record['game_username']
+                    key = (discord_id, game_type)
+
+                    owner = self.claimed.get((game_type, game_username)) or owners.get((game_type, game_username))
+                    if owner is not None and owner != discord_id:
+                        conflicts.append((line, record, f"{game_username} is al gekoppeld aan Discord ID {owner}"))
+                        continue
+
+                    earlier = self.linked.get(key)
+                    if earlier is not None and earlier != game_username:
+                        conflicts.append((line, record, f"dubbel in de import, eerder al {earlier}"))
+                        continue
+
+                    existing = current.get(key)
+                    if existing == game_username or earlier == game_username:
+                        counts['unchanged'] += 1
+                        continue
+                    if existing is not None and not self.replace:
+                        conflicts.append((line, record, f"heeft al een {game_type} account: {existing}"))
+                        continue
+
+                    counts['updated' if existing is not None else 'inserted'] += 1
+                    self.linked[key] = game_username
+                    self.claimed[(game_type, game_username)] = discord_id
+                    made.append((key, (game_type, game_username)))
+                    users.setdefault(discord_id, record.get('discord_username') or discord_id)
+                    accounts.append((discord_id, game_type, game_username))
+
+                if accounts and not self.dry_run:
+                    await db.executemany(self.USER_SQL, list(users.items()))
+                    await db.executemany(self.ACCOUNT_SQL, accounts)
+        except Exception as e:
+            # De hele batch is teruggedraaid
+            logger.error(f"Error importing batch of {len(valid)} accounts: {e}")
+            self.stats['failed_batches'] += 1
+            for key, claim in made:
+                self.linked.pop(key, None)
+                self.claimed.pop(claim, None)
+            for line, record in valid:
+                self._conflict(line, record, f"batch mislukt: {e}")
+            return
+
+        for name, count in counts.items():
+            self.stats[name] += count
+        for conflict in conflicts:
+            self._conflict(*conflict)
+
+    async def _existing(self, db, batch: list):
+        """
+        Huidige koppelingen van de gebruikers en usernames in een batch
+        """
+        discord_ids = list({record['discord_id'] for _, record in batch})
+        usernames = list({record['game_username'] for _, record in batch})
+
+        current = {}
+        cursor = await db.execute(
+            f"""SELECT discord_id, game_type, game_username FROM game_accounts
+                WHERE discord_id IN ({','.join('?' * len(discord_ids))})""",
+            discord_ids
+        )
+        for discord_id, game_type, game_username in await cursor.fetchall():
+            current[(discord_id, game_type)] = game_username
+        await cursor.close()
+
+        owners = {}
+        cursor = await db.execute(
+            f"""SELECT game_type, game_username, discord_id FROM game_accounts
+                WHERE game_username IN ({','.join('?' * len(usernames))})""",
+            usernames
+        )
+        for game_type, game_username, discord_id in await cursor.fetchall():
+            owners[(game_type, game_username)] = discord_id
+        await cursor.close()
+
+        return current, owners
+
+def write_conflicts(conflicts: list, path: str):
+    """
+    Schrijf het conflict rapport als CSV
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('line', 'discord_id', 'game_type', 'game_username', 'reason'))
+        for line, record, reason in conflicts:
+            writer.writerow((line, record.get('discord_id'), record.get('game_type'),
+                             record.get('game_username'), reason))
+
+async def export_accounts(db: DatabasePool, output, fmt: str = 'csv', game_type: str = None,
+                          batch_size: int = 1000) -> int:
+    """
+    Stream alle koppelingen naar een open tekstbestand, geeft het aantal rijen terug
+    """
+    sql = """SELECT ga.discord_id, u.discord_username, ga.game_type, ga.game_username,
+                    ga.verified, ga.created_at
+             FROM game_accounts ga
+             LEFT JOIN users u ON u.discord_id = ga.discord_id"""
+    params = ()
+    if game_type:
+        sql += " WHERE ga.game_type = ?"
+        params = (game_type.lower(),)
+    sql += " ORDER BY ga.id"
+
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(EXPORT_COLUMNS)
+
+    count = 0
+    async with db.reader() as conn:
+        cursor = await conn.execute(sql, params)
+        try:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if writer is not None:
+                    writer.writerows(rows)
+                else:
+                    output.writelines(
+                        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows
+                    )
+                count += len(rows)
+        finally:
+            await cursor.close()
+    return count
+
+async def run_import(args) -> dict:
+    links = read_links(args.links) if args.links else None
+    if args.format == 'whitelist' or (args.format is None and detect_format(args.path) == 'whitelist'):
+        if not links:
+            raise SystemExit("Een whitelist heeft geen Discord IDs, geef een koppeling mee met --links")
+
+    db = DatabasePool(args.database, reader_count=1)
+    await db.open()
+    try:
+        importer = AccountImporter(db, args.batch_size, replace=args.replace, dry_run=args.dry_run)
+        stats = await importer.import_records(read_records(args.path, args.format, args.game, links))
+    finally:
+        await db.close()
+
+    if args.conflicts:
+        write_conflicts(importer.conflicts, args.conflicts)
+    else:
+        for line, record, reason in importer.conflicts[:20]:
+            print(f"{line}: {record.get('discord_id')} {record.get('game_type')}:{record.get('game_username')} "
+                  f"- {reason}", file=sys.stderr)
+    return stats
+
+async def run_export(args) -> dict:
+    db = DatabasePool(args.database, reader_count=1)
+    await db.open()
+    try:
+        fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+        with open(args.path, 'w', encoding='utf-8', newline='') as output:
+            count = await export_accounts(db, output, fmt, args.game)
+    finally:
+        await db.close()
+    return {'exported': count}
+
+def main():
+    """
+    Command line interface voor import en export
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Bulk import en export van gekoppelde game accounts")
+    parser.add_argument('--database', default=os.getenv('DATABASE_PATH', 'gameserver_bot.db'),
+                        help="SQLite database van de bot")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Importeer accounts uit een bestand")
+    import_parser.add_argument('path', help="CSV, JSON(L) of whitelist.json bestand")
+    import_parser.add_argument('--format', choices=('csv', 'json', 'jsonl', 'whitelist'),
+                               help="Formaat (standaard uit de bestandsnaam)")
+    import_parser.add_argument('--game', help="Game type voor records zonder game_type, bijv. minecraft")
+    import_parser.add_argument('--links', help="Koppeling uuid/naam -> Discord ID voor een whitelist")
+    import_parser.add_argument('--batch-size', type=int, default=None, help="Records per transactie")
+    import_parser.add_argument('--replace', action='store_true',
+                               help="Vervang bestaande accounts van een gebruiker in plaats van ze als conflict te melden")
+    import_parser.add_argument('--dry-run', action='store_true', help="Alleen controleren, niets wegschrijven")
+    import_parser.add_argument('--conflicts', help="Schrijf alle conflicten als CSV naar dit bestand")
+
+    export_parser = commands.add_parser('export', help="Exporteer alle gekoppelde accounts")
+    export_parser.add_argument('path', help="Uitvoer bestand (.csv of .jsonl)")
+    export_parser.add_argument('--format', choices=('csv', 'jsonl'), help="Formaat (standaard uit de bestandsnaam)")
+    export_parser.add_argument('--game', help="Alleen accounts van dit game type")
+
+    args = parser.parse_args()
+    if args.command == 'import':
+        result = asyncio.run(run_import(args))
+    else:
+        result = asyncio.run(run_export(args))
+
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Activity Rollups & Retention
+===========================
+
+Onderhoud van de activity_rollup_hourly/daily tabellen, een achtergrond job
+die oude activity_log rijen in kleine batches opruimt (en optioneel
+archiveert), en statistiek queries die alleen de rollups lezen.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLES = ('activity_rollup_hourly', 'activity_rollup_daily')
+
+UPSERT_SQL = """INSERT INTO {table} (bucket, server_id, action, game_username, count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(bucket, server_id, action, game_username)
+                DO UPDATE SET count = count + excluded.count"""
+
+def rollup_counts(rows) -> dict:
+    """
+    Tel activity rijen per uur- en dagbucket
+
+    Verwacht rijen als (server_id, action, game_username, timestamp) met een
+    timestamp in het CURRENT_TIMESTAMP formaat.
+    """
+    hourly = Counter()
+    daily = Counter()
+    for server_id, action, game_username, timestamp in rows:
+        server_id = server_id or 0
+        game_username = game_username or ''
+        hourly[(timestamp[:13] + ':00:00', server_id, action, game_username)] += 1
+        daily[(timestamp[:10], server_id, action, game_username)] += 1
+
+    return {
+        'activity_rollup_hourly': [key + (count,) for key, count in hourly.items()],
+        'activity_rollup_daily': [key + (count,) for key, count in daily.items()],
+    }
+
+async def apply_rollups(db, rows):
+    """
+    Werk de rollups bij binnen een lopende transactie van de writer connectie
+    """
+    for table, values in rollup_counts(rows).items():
+        await db.executemany(UPSERT_SQL.format(table=table), values)
+
+def _utc_cutoff(days: float) -> str:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    return cutoff.strftime('%Y-%m-%d %H:%M:%S')
+
+class ActivityRetention:
+    """
+    Achtergrond job die oude activity_log rijen in kleine batches verwijdert
+
+    De tellingen blijven bewaard in de rollups. Als ACTIVITY_ARCHIVE_DIR is
+    ingesteld worden de rijen eerst als JSON lines in een gzip archief per
+    maand geschreven.
+    """
+
+    def __init__(self, db, retention_days: float = None, batch_size: int = None,
+                 interval: float = None, archive_dir: str = None):
+        self.db = db
+        self.retention_days = retention_days if retention_days is not None else float(
+            os.getenv('ACTIVITY_RETENTION_DAYS', 90)
+        )
+        self.batch_size = batch_size or int(os.getenv('ACTIVITY_RETENTION_BATCH', 500))
+        self.interval = interval or float(os.getenv('ACTIVITY_RETENTION_INTERVAL', 3600))
+        self.archive_dir = archive_dir if archive_dir is not None else os.getenv('ACTIVITY_ARCHIVE_DIR')
+        # Pauze tussen batches, zodat de writer vrij komt voor de bot
+        self.pause = 0.05
+        self._task = None
+
+    def start(self):
+        """
+        Start de periodieke opruim job (uitgeschakeld bij 0 dagen)
+        """
+        if self.retention_days <= 0:
+            logger.info("Activity log retentie uitgeschakeld")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="activity-retention")
+
+    async def stop(self):
+        """
+        Stop de opruim job
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        """
+        Ruim periodiek op, fouten worden gelogd en bij de volgende ronde opnieuw geprobeerd
+        """
+        while True:
+            try:
+                removed = await self.purge()
+                if removed:
+                    logger.info(f"Activity log retentie: {removed} oude rijen opgeruimd")
+            except Exception as e:
+                logger.error(f"Error during activity log retention: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def purge(self) -> int:
+        """
+        Verwijder (en archiveer) alle rijen ouder dan de retentie, batch voor batch
+        """
+        cutoff = _utc_cutoff(self.retention_days)
+        removed = 0
+
+        while True:
+            rows = await self.db.fetchall(
+                """SELECT id, discord_id, server_id, action, game_username, result, reason, timestamp
+                   FROM activity_log
+                   WHERE timestamp < ?
+                   ORDER BY timestamp
+                   LIMIT ?""",
+                (cutoff, self.batch_size)
+            )
+            if not rows:
+                return removed
+
+            if self.archive_dir:
+                await asyncio.get_running_loop().run_in_executor(None, self._archive, rows)
+
+            await self.db.executemany("DELETE FROM activity_log WHERE id = ?", [(row[0],) for row in rows])
+            removed += len(rows)
+            await asyncio.sleep(self.pause)
+
+    def _archive(self, rows):
+        """
+        Schrijf rijen naar een gzip JSON lines archief per maand
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        columns = ('id', 'discord_id', 'server_id', 'action', 'game_username', 'result', 'reason', 'timestamp')
+        files = {}
+        try:
+            for row in rows:
+                month = str(row[-1])[:7]
+                f = files.get(month)
+                if f is None:
+                    path = os.path.join(self.archive_dir, f"activity_log-{month}.jsonl.gz")
+                    f = files[month] = gzip.open(path, 'at', encoding='utf-8')
+                f.write(json.dumps(dict(zip(columns, row))) + '\n')
+        finally:
+            for f in files.values():
+                f.close()
+
+async def action_totals(db, days: float, server_name: str = None, player_name: str = None) -> list:
+    """
+    Aantal acties per server en actie over de laatste `days` dagen, uit de rollups
+    """
+    # Voor korte periodes zijn de uur-buckets nauwkeuriger
+    if days <= 2:
+        table = 'activity_rollup_hourly'
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:00:00')
+    else:
+        table = 'activity_rollup_daily'
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    sql = f"""SELECT COALESCE(s.server_name, 'onbekend'), r.action, SUM(r.count)
+              FROM {table} r
+              LEFT JOIN servers s ON s.id = r.server_id
+              WHERE r.bucket >= ?"""
+    params = [since]
+    if server_name:
+        sql += " AND s.server_name = ?"
+        params.append(server_name)
+    if player_name:
+        sql += " AND r.game_username = ?"
+        params.append(player_name)
+    sql += " GROUP BY 1, 2 ORDER BY 1, 3 DESC"
+
+    return await db.fetchall(sql, tuple(params))
+
+async def top_players(db, days: float, action: str, server_name: str = None, limit: int = 5) -> list:
+    """
+    Spelers met de meeste acties van een soort (bijv. unauthorized_join), uit de dag-rollups
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+    sql = """SELECT r.game_username, SUM(r.count) AS total
+             FROM activity_rollup_daily r
+             LEFT JOIN servers s ON s.id = r.server_id
+             WHERE r.bucket >= ? AND r.action = ? AND r.game_username != ''"""
+    params = [since, action]
+    if server_name:
+        sql += " AND s.server_name = ?"
+        params.append(server_name)
+    sql += " GROUP BY r.game_username ORDER BY total DESC LIMIT ?"
+    params.append(limit)
+
+    return await db.fetchall(sql, tuple(params))
@@ -0,0 +1,123 @@
+"""
+Activity Log Writer
+==================
+
+Write-behind buffer voor de activity_log tabel.
+Acties worden in het geheugen verzameld en in een enkele transactie met
+executemany weggeschreven, in plaats van een commit per rij. In dezelfde
+transactie worden de uur- en dag-rollups bijgewerkt.
+"""
+
+import asyncio
+import os
+import logging
+from datetime import datetime, timezone
+
+from activity_rollups import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+class ActivityLogWriter:
+    """
+    Verzamelt activity_log records en schrijft ze in batches weg
+    """
+
+    INSERT_SQL = """INSERT INTO activity_log
+                    (discord_id, server_id, action, game_username, result, reason, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+    def __init__(self, db, batch_size: int = None, flush_interval_ms: int = None):
+        self.db = db
+        self.batch_size = batch_size or int(os.getenv('ACTIVITY_BATCH_SIZE', 100))
+        self.flush_interval = (flush_interval_ms or int(os.getenv('ACTIVITY_FLUSH_INTERVAL_MS', 1000))) / 1000
+        # Als de database een tijd onbereikbaar is bewaren we niet eindeloos rijen
+        self.max_buffer = self.batch_size * 50
+
+        self.buffer = []
+        self.server_ids = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+    async def start(self):
+        """
+        Laad de server id cache en start de achtergrond flusher
+        """
+        rows = await self.db.fetchall("SELECT server_name, id FROM servers")
+        self.server_ids = dict(rows)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="activity-log-writer")
+
+    async def stop(self):
+        """
+        Stop de flusher en schrijf alles wat nog in de buffer staat weg
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def record(self, server_name: str, game_username: str, action: str, reason: str,
+               result: str = 'success', discord_id: str = None):
+        """
+        Zet een activity record in de buffer
+        """
+        # Zelfde formaat als CURRENT_TIMESTAMP, maar op het moment van de actie
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.buffer.append((discord_id, server_name, action, game_username, result, reason, timestamp))
+
+        if len(self.buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """
+        Schrijf de buffer in een transactie weg
+        """
+        async with self._flush_lock:
+            if not self.buffer:
+                return
+
+            records, self.buffer = self.buffer, []
+            try:
+                rows = [
+                    (discord_id, await self._server_id(server_name), action, game_username, result, reason, timestamp)
+                    for discord_id, server_name, action, game_username, result, reason, timestamp in records
+                ]
+                async with self.db.writer() as db:
+                    await db.executemany(self.INSERT_SQL, rows)
+                    await apply_rollups(db, [
+                        (server_id, action, game_username, timestamp)
+                        for _, server_id, action, game_username, _, _, timestamp in rows
+                    ])
+            except Exception as e:
+                logger.error(f"Error flushing activity log ({len(records)} records): {e}")
+                # Terugzetten voor de volgende poging, oudste records vallen eraf
+                self.buffer = (records + self.buffer)[-self.max_buffer:]
+
+    async def _server_id(self, server_name: str):
+        """
+        Zoek het server id op, eerst in de cache
+        """
+        if server_name in self.server_ids:
+            return self.server_ids[server_name]
+
+        row = await self.db.fetchone("SELECT id FROM servers WHERE server_name = ?", (server_name,))
+        if row is None:
+            return None
+
+        self.server_ids[server_name] = row[0]
+        return row[0]
+
+    async def _run(self):
+        """
+        Flush zodra de buffer vol is of het flush interval verstreken is
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
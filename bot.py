@@ -10,13 +10,23 @@ Auteur: VaultNet Homelab Project
 
 import discord
 from discord.ext import commands
-import aiosqlite
 import asyncio
 import os
 import logging
 from dotenv import load_dotenv
 from datetime import datetime
 
+from database import DatabasePool
+from access_index import AccessIndex
+from activity_writer import ActivityLogWriter
+from activity_rollups import ActivityRetention, action_totals, top_players
+from notifications import NotificationDispatcher
+from rcon_client import RconPool
+from log_monitor import GameLogMonitor
+from log_checkpoints import LogCheckpointStore
+from level_sync import LevelSynchronizer
+from chat_moderation import ChatModerator
+
 # Laad environment variabelen
 load_dotenv()
 
@@ -50,24 +60,58 @@ class GameServerBot(commands.Bot):
 
         # Database
         self.db_path = os.getenv('DATABASE_PATH', 'gameserver_bot.db')
+        self.db = DatabasePool(self.db_path)
+        self.access_index = AccessIndex(self.db)
+        self.activity_writer = ActivityLogWriter(self.db)
+        self.activity_retention = ActivityRetention(self.db)
+        self.notifier = NotificationDispatcher(self)
+        self.level_sync = LevelSynchronizer(self)
+        self.log_checkpoints = LogCheckpointStore(self.db)
+        self.chat_moderator = ChatModerator()
 
         # Configuratie
         self.guild_id = int(os.getenv('GUILD_ID', 0))
         self.debug_mode = os.getenv('DEBUG_MODE', 'False').lower() == 'true'
 
         # Game server monitoring
-        self.log_monitors = {}
-        self.rcon_connections = {}
+        self.log_monitor = GameLogMonitor(self)
+        self.rcon_connections = RconPool(self.db)
 
     async def setup_hook(self):
         """
         Setup die wordt uitgevoerd wanneer de bot start
         """
         # Database initialiseren
+        await self.db.open()
         await self.init_database()
 
-        # Log monitors starten
-        await self.start_log_monitoring()
+        # Caches parallel opwarmen: toegangsindex (voordat er join events
+        # binnenkomen), server ids, kanalen, RCON configuratie, Discord levels
+        # en log posities lezen allemaal alleen uit de database; de chat
+        # filter wordt ondertussen uit zijn bestand opgebouwd
+        await asyncio.gather(
+            self.access_index.load(),
+            self.activity_writer.start(),
+            self.notifier.load_channels(),
+            self.rcon_connections.load(),
+            self.level_sync.load_snapshot(),
+            self.log_checkpoints.load(),
+            self.chat_moderator.load(),
+        )
+        self.activity_retention.start()
+        self.access_index.start()
+        # Volledige level sync start zodra de bot ready is
+        self.level_sync.start()
+        self.log_checkpoints.start()
+        self.chat_moderator.start()
+
+        # Log monitors starten (verder vanaf de opgeslagen posities), tegelijk
+        # met het opbouwen van de RCON verbindingen en ophalen van de kanalen
+        await asyncio.gather(
+            self.start_log_monitoring(),
+            self.rcon_connections.connect_all(),
+            self.notifier.warm_channels(),
+        )
 
         logger.info("Bot setup voltooid!")
 
@@ -76,25 +120,56 @@ class GameServerBot(commands.Bot):
         Initialiseer de database met het schema
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Lees database schema
-                if os.path.exists('database_setup.sql'):
-                    with open('database_setup.sql', 'r') as f:
-                        schema = f.read()
-                    await db.executescript(schema)
-                    await db.commit()
-                    logger.info("Database schema geladen")
-                else:
-                    logger.warning("database_setup.sql niet gevonden")
+            # Lees database schema
+            if os.path.exists('database_setup.sql'):
+                with open('database_setup.sql', 'r') as f:
+                    schema = f.read()
+                await self.db.executescript(schema)
+                # Kolommen die later aan bestaande tabellen zijn toegevoegd
+                await self.db.ensure_columns('servers', {'log_source': "TEXT DEFAULT 'auto'"})
+                logger.info("Database schema geladen")
+            else:
+                logger.warning("database_setup.sql niet gevonden")
         except Exception as e:
             logger.error(f"Database initialisatie gefaald: {e}")
 
     async def start_log_monitoring(self):
         """
         Start log monitoring voor alle geconfigureerde servers
+
+        Alle servers starten tegelijk; een ontbrekend of traag log pad (bijv.
+        een hangende NFS mount) loopt in een timeout zonder de rest op te houden.
         """
-        # Dit wordt later geïmplementeerd met watchdog
-        logger.info("Log monitoring voorbereid (implementatie volgt)")
+        rows = await self.db.fetchall(
+            "SELECT server_name, game_type, log_path, log_source FROM servers WHERE active"
+        )
+
+        servers = []
+        for server_name, game_type, log_path, log_source in rows:
+            # Zonder pad in de database het pad uit de .env (bijv. MINECRAFT_LOG_PATH)
+            log_path = log_path or os.getenv(f'{game_type.upper()}_LOG_PATH')
+            if not log_path:
+                logger.warning(f"Geen log pad voor {server_name}, monitoring overgeslagen")
+                continue
+            servers.append((server_name, game_type, log_path, log_source))
+
+        if not servers:
+            logger.info("Geen actieve servers met een log pad gevonden")
+            return
+
+        await self.log_monitor.start()
+        results = await asyncio.gather(
+            *(self.log_monitor.start_monitoring(*server) for server in servers),
+            return_exceptions=True
+        )
+
+        started = 0
+        for (server_name, _, _, _), result in zip(servers, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to start monitoring for {server_name}: {result}")
+            elif result:
+                started += 1
+        logger.info(f"Log monitoring gestart voor {started}/{len(servers)} servers")
 
     async def on_ready(self):
         """
@@ -112,6 +187,31 @@ class GameServerBot(commands.Bot):
             await self.tree.sync()
             logger.info("Slash commands globaal gesynchroniseerd")
 
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """
+        Detecteer level veranderingen (werkt met bots zoals MEE6)
+        """
+        if self.guild_id and after.guild.id != self.guild_id:
+            return
+        if before.roles != after.roles:
+            await self.level_sync.update_member(after)
+
+    async def close(self):
+        """
+        Sluit de bot en de database connecties netjes af
+        """
+        await self.level_sync.stop()
+        await self.access_index.stop()
+        await self.log_monitor.shutdown()
+        await self.chat_moderator.stop()
+        await self.log_checkpoints.stop()
+        await self.notifier.stop()
+        await self.rcon_connections.close()
+        await super().close()
+        await self.activity_retention.stop()
+        await self.activity_writer.stop()
+        await self.db.close()
+
 # Commando's en event handlers
 @discord.app_commands.describe(
     game="Het type game (minecraft, palworld, beamng, etc.)",
@@ -122,8 +222,8 @@ async def link_game_account(interaction: discord.Interaction, game: str, usernam
     Koppel je Discord account aan een game username
     """
     try:
-        # Database operatie
-        async with aiosqlite.connect(interaction.client.db_path) as db:
+        # Database operatie, beide statements in een transactie
+        async with interaction.client.db.writer() as db:
             # Voeg gebruiker toe als die nog niet bestaat
             await db.execute(
                 "INSERT OR IGNORE INTO users (discord_id, discord_username) VALUES (?, ?)",
@@ -138,7 +238,8 @@ async def link_game_account(interaction: discord.Interaction, game: str, usernam
                 (str(interaction.user.id), game.lower(), username)
             )
 
-            await db.commit()
+        interaction.client.access_index.set_account(game.lower(), username, str(interaction.user.id))
+        interaction.client.log_monitor.kick_cooldown.forget_player(username)
 
         # Succesbericht
         embed = discord.Embed(
@@ -163,14 +264,12 @@ async def my_accounts(interaction: discord.Interaction):
     Bekijk je gekoppelde game accounts
     """
     try:
-        async with aiosqlite.connect(interaction.client.db_path) as db:
-            cursor = await db.execute(
-                """SELECT game_type, game_username, verified, created_at 
-                   FROM game_accounts 
-                   WHERE discord_id = ?""",
-                (str(interaction.user.id),)
-            )
-            accounts = await cursor.fetchall()
+        accounts = await interaction.client.db.fetchall(
+            """SELECT game_type, game_username, verified, created_at 
+               FROM game_accounts 
+               WHERE discord_id = ?""",
+            (str(interaction.user.id),)
+        )
 
         if not accounts:
             embed = discord.Embed(
@@ -201,13 +300,143 @@ async def my_accounts(interaction: discord.Interaction):
             ephemeral=True
         )
 
-# Event handler voor berichten
-async def on_member_update(before: discord.Member, after: discord.Member):
+@discord.app_commands.describe(
+    server="Naam van de server (leeg voor alle servers)"
+)
+async def online_players(interaction: discord.Interaction, server: str = None):
+    """
+    Bekijk wie er nu online is, direct uit het geheugen van de log monitor
+    """
+    try:
+        roster = interaction.client.log_monitor.roster
+        servers = [server] if server else sorted(interaction.client.log_monitor.active_monitors)
+
+        embed = discord.Embed(title="🟢 Online Spelers", color=discord.Color.green())
+        for server_name in servers[:25]:
+            players = roster.players(server_name)
+            if players:
+                names = ", ".join(f"`{name}`" for name in sorted(players))
+            else:
+                names = "Niemand online"
+            embed.add_field(name=f"{server_name} ({len(players)})", value=names[:1024], inline=False)
+
+        if not embed.fields:
+            embed.description = "Er worden geen servers gemonitord."
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Error fetching online players: {e}")
+        await interaction.response.send_message(
+            "❌ Er ging iets mis bij het ophalen van de online spelers.",
+            ephemeral=True
+        )
+
+@discord.app_commands.describe(
+    server="Naam van de server (leeg voor alle servers)"
+)
+@discord.app_commands.default_permissions(administrator=True)
+async def latency_stats(interaction: discord.Interaction, server: str = None):
+    """
+    Bekijk de latency van join tot kick per server (alleen voor beheerders)
+    """
+    try:
+        monitor = interaction.client.log_monitor
+        tracker = monitor.latency
+        servers = [server] if server else tracker.servers()
+
+        embed = discord.Embed(
+            title="⏱️ Pipeline Latency",
+            description="p50 / p95 / p99 in ms (aantal metingen)",
+            color=discord.Color.blue()
+        )
+
+        for server_name in servers[:20]:
+            stats = tracker.percentiles(server_name)
+            if not stats:
+                continue
+            lines = [
+                f"`{stage}` {p50} / {p95} / {p99} ({count})"
+                for stage, (p50, p95, p99, count) in stats.items()
+            ]
+            embed.add_field(name=server_name, value="\n".join(lines)[:1024], inline=False)
+
+        if not embed.fields:
+            embed.description = "Nog geen metingen beschikbaar."
+
+        slow_events = [e for e in tracker.slow_events if not server or e['server'] == server][-5:]
+        if slow_events:
+            lines = [
+                f"**{e['server']}** {e['event_type']} `{e['player']}`: {e['ms'].get('total')} ms"
+                for e in slow_events
+            ]
+            embed.add_field(
+                name=f"Trage events (> {int(tracker.slow_threshold * 1000)} ms)",
+                value="\n".join(lines)[:1024],
+                inline=False
+            )
+
+        queue = monitor.get_queue_stats()
+        embed.set_footer(
+            text=f"Queue: {queue['queued']} wachtend, {queue['processed']} verwerkt, {queue['dropped']} gedropt"
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Error fetching latency stats: {e}")
+        await interaction.response.send_message(
+            "❌ Er ging iets mis bij het ophalen van de latency statistieken.",
+            ephemeral=True
+        )
+
+@discord.app_commands.describe(
+    server="Naam van de server (leeg voor alle servers)",
+    player="Game username om op te filteren (optioneel)",
+    days="Aantal dagen terug (standaard 7)"
+)
+@discord.app_commands.default_permissions(administrator=True)
+async def activity_stats(interaction: discord.Interaction, server: str = None, player: str = None, days: int = 7):
     """
-    Detecteer level veranderingen (werkt met bots zoals MEE6)
+    Bekijk activiteit statistieken per server (alleen voor beheerders)
     """
-    # Dit wordt geïmplementeerd als er level bots zijn geconfigureerd
-    pass
+    try:
+        days = max(1, min(days, 365))
+        db = interaction.client.db
+        totals = await action_totals(db, days, server_name=server, player_name=player)
+
+        embed = discord.Embed(
+            title=f"📊 Activiteit afgelopen {days} dag(en)",
+            description=f"Speler: `{player}`" if player else None,
+            color=discord.Color.blue()
+        )
+
+        per_server = {}
+        for server_name, action, count in totals:
+            per_server.setdefault(server_name, []).append(f"**{action}**: {count}")
+        for server_name, lines in list(per_server.items())[:20]:
+            embed.add_field(name=server_name, value="\n".join(lines)[:1024], inline=True)
+
+        if not player:
+            offenders = await top_players(db, days, 'unauthorized_join', server_name=server)
+            if offenders:
+                embed.add_field(
+                    name="🚫 Meeste unauthorized joins",
+                    value="\n".join(f"`{name}`: {count}" for name, count in offenders),
+                    inline=False
+                )
+
+        if not embed.fields:
+            embed.description = "Geen activiteit gevonden in deze periode."
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Error fetching activity stats: {e}")
+        await interaction.response.send_message(
+            "❌ Er ging iets mis bij het ophalen van de statistieken.",
+            ephemeral=True
+        )
 
 async def main():
     """
@@ -239,6 +468,30 @@ async def main():
         )
     )
 
+    bot.tree.add_command(
+        discord.app_commands.Command(
+            name="online",
+            description="Bekijk wie er nu online is op de gameservers",
+            callback=online_players
+        )
+    )
+
+    bot.tree.add_command(
+        discord.app_commands.Command(
+            name="latency",
+            description="Bekijk de join-to-kick latency per server (beheerders)",
+            callback=latency_stats
+        )
+    )
+
+    bot.tree.add_command(
+        discord.app_commands.Command(
+            name="stats",
+            description="Bekijk activiteit statistieken per server (beheerders)",
+            callback=activity_stats
+        )
+    )
+
     try:
         await bot.start(token)
     except KeyboardInterrupt:
@@ -0,0 +1,216 @@
+"""
+Chat Moderation
+==============
+
+Controleert chat berichten op een lijst verboden termen. De termen komen
+uit een tekstbestand (CHAT_BANNED_TERMS_FILE) en worden eenmalig omgezet
+naar een Aho-Corasick automaat, zodat een bericht in een enkele pass over
+de tekens gecontroleerd wordt, hoe lang de lijst ook is. Als het bestand
+verandert wordt op de achtergrond een nieuwe automaat gebouwd en in een
+keer omgewisseld.
+
+Formaat van het bestand, een term per regel:
+
+    # commentaar
+    scheldwoord
+    kick: nog erger woord
+
+Termen met "kick:" ervoor kicken de speler, de rest wordt alleen gemeld.
+Hoofdletters maken niet uit.
+"""
+
+import asyncio
+import os
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ('notify', 'kick')
+
+# Kick reden die de speler in game ziet
+CHAT_KICK_REASON = 'Gekickt wegens verboden taalgebruik in de chat'
+
+class TermAutomaton:
+    """
+    Aho-Corasick automaat over een vaste set termen
+    """
+
+    __slots__ = ('goto', 'fail', 'output', 'size')
+
+    def __init__(self, terms: dict):
+        """
+        terms: term (al casefolded) -> actie
+        """
+        goto = [{}]
+        output = [()]
+        for term, action in terms.items():
+            node = 0
+            for char in term:
+                child = goto[node].get(char)
+                if child is None:
+                    child = goto[node][char] = len(goto)
+                    goto.append({})
+                    output.append(())
+                node = child
+            output[node] = output[node] + ((term, action),)
+
+        # Breadth-first de fail links zetten, zodat een node ook de matches
+        # van zijn langste suffix in de automaat meeneemt
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                output[child] = output[child] + output[fail[child]]
+
+        self.goto = goto
+        self.fail = fail
+        self.output = output
+        self.size = len(terms)
+
+    def search(self, text: str):
+        """
+        Geef (eind index, term, actie) voor elke match in de tekst
+        """
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for term, action in output[node]:
+                    yield index, term, action
+
+def parse_terms(lines) -> dict:
+    """
+    Lees termen met hun actie uit de regels van een termen bestand
+    """
+    terms = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        action = 'notify'
+        prefix, sep, rest = line.partition(':')
+        if sep and prefix.strip().lower() in ACTIONS:
+            action = prefix.strip().lower()
+            line = rest.strip()
+        term = line.casefold()
+        if not term:
+            continue
+        # Bij een dubbele term wint de zwaarste actie
+        if terms.get(term) != 'kick':
+            terms[term] = action
+    return terms
+
+class ChatModerator:
+    """
+    Houdt de automaat actueel en controleert berichten
+    """
+
+    def __init__(self, path: str = None, reload_interval: float = None, whole_words: bool = None):
+        self.path = path or os.getenv('CHAT_BANNED_TERMS_FILE', 'banned_terms.txt')
+        self.reload_interval = reload_interval or float(os.getenv('CHAT_TERMS_RELOAD_INTERVAL', 30))
+        if whole_words is None:
+            whole_words = os.getenv('CHAT_MATCH_WHOLE_WORDS', 'true').lower() in ('1', 'true', 'yes')
+        self.whole_words = whole_words
+
+        self.automaton = TermAutomaton({})
+        self.stats = {'checked': 0, 'flagged': 0, 'reloads': 0}
+        self._signature = ()    # (inode, grootte, mtime) van het geladen bestand, None = geen bestand
+        self._task = None
+
+    async def load(self):
+        """
+        Bouw de automaat (in een executor, lange lijsten kosten even) en wissel hem om
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(None, self._build)
+        except Exception as e:
+            logger.error(f"Error loading banned chat terms from {self.path}: {e}")
+            return
+        if result is None:
+            return
+
+        # Een enkele toewijzing: lopende checks gebruiken nog de oude automaat
+        self.automaton, self._signature = result
+        self.stats['reloads'] += 1
+        if self.automaton.size:
+            logger.info(f"Chat filter geladen: {self.automaton.size} termen uit {self.path}")
+
+    def start(self):
+        """
+        Start het periodiek controleren van het termen bestand
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="chat-moderation-reload")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def check(self, message: str) -> list:
+        """
+        Geef de gevonden termen als [(term, actie)], zonder dubbelen
+        """
+        automaton = self.automaton
+        if not automaton.size or not message:
+            return []
+
+        self.stats['checked'] += 1
+        text = message.casefold()
+        found = {}
+        for end, term, action in automaton.search(text):
+            if self.whole_words and not self._is_word(text, end - len(term) + 1, end + 1):
+                continue
+            if found.get(term) != 'kick':
+                found[term] = action
+
+        if found:
+            self.stats['flagged'] += 1
+        return list(found.items())
+
+    @staticmethod
+    def _is_word(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+    def _build(self):
+        """
+        Lees het bestand en bouw een nieuwe automaat (blokkerend)
+
+        Geeft None terug als het bestand sinds de vorige keer niet veranderd is.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._signature is None:
+                return None
+            logger.info(f"Geen chat filter bestand gevonden ({self.path}), chat moderation staat uit")
+            return TermAutomaton({}), None
+
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return None
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            terms = parse_terms(f)
+        return TermAutomaton(terms), signature
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.load()
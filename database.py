@@ -0,0 +1,172 @@
+"""
+Database Connection Pool
+=======================
+
+Gedeelde, langlevende SQLite connecties voor de bot.
+Lezers gebruiken een kleine pool van connecties, alle writes lopen via een
+enkele writer connectie zodat ze nooit met elkaar om de lock vechten.
+"""
+
+import asyncio
+import os
+import logging
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+class DatabasePool:
+    """
+    Pool van persistente aiosqlite connecties met WAL mode
+    """
+
+    # Toegepast op elke connectie die de pool opent
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",      # Veilig in WAL mode, veel minder fsyncs
+        "PRAGMA cache_size=-8000",        # ~8MB page cache per connectie
+        "PRAGMA mmap_size=67108864",      # 64MB memory-mapped I/O
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    def __init__(self, db_path: str, reader_count: int = None, statement_cache_size: int = 256):
+        self.db_path = db_path
+        self.reader_count = reader_count or int(os.getenv('DATABASE_READERS', 3))
+        # sqlite3 houdt per connectie een cache van prepared statements bij,
+        # die blijft bewaard omdat de connecties open blijven
+        self.statement_cache_size = statement_cache_size
+
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._readers = asyncio.Queue()
+        self._all_readers = []
+
+    async def open(self):
+        """
+        Open de writer en reader connecties
+        """
+        if self._writer is not None:
+            return
+
+        self._writer = await self._connect()
+        for _ in range(self.reader_count):
+            reader = await self._connect()
+            self._all_readers.append(reader)
+            self._readers.put_nowait(reader)
+
+        logger.info(f"Database pool geopend ({self.reader_count} readers + 1 writer)")
+
+    async def close(self):
+        """
+        Sluit alle connecties
+        """
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers = []
+        self._readers = asyncio.Queue()
+
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """
+        Maak een nieuwe connectie met de juiste pragmas
+        """
+        db = await aiosqlite.connect(self.db_path, cached_statements=self.statement_cache_size)
+        for pragma in self.PRAGMAS:
+            await db.execute(pragma)
+        return db
+
+    @asynccontextmanager
+    async def reader(self):
+        """
+        Leen een reader connectie uit de pool
+        """
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def writer(self):
+        """
+        Exclusieve toegang tot de writer connectie, commit bij succes
+        """
+        async with self._write_lock:
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+    async def fetchone(self, sql: str, params: tuple = ()):
+        """
+        Voer een query uit en geef de eerste rij terug
+        """
+        async with self.reader() as db:
+            cursor = await db.execute(sql, params)
+            try:
+                return await cursor.fetchone()
+            finally:
+                await cursor.close()
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list:
+        """
+        Voer een query uit en geef alle rijen terug
+        """
+        async with self.reader() as db:
+            cursor = await db.execute(sql, params)
+            try:
+                return await cursor.fetchall()
+            finally:
+                await cursor.close()
+
+    async def execute(self, sql: str, params: tuple = ()) -> int:
+        """
+        Voer een write statement uit in een eigen transactie, geeft rowcount terug
+        """
+        async with self.writer() as db:
+            cursor = await db.execute(sql, params)
+            rowcount = cursor.rowcount
+            await cursor.close()
+            return rowcount
+
+    async def executemany(self, sql: str, rows) -> int:
+        """
+        Voer een write statement uit voor meerdere rijen in een transactie
+        """
+        async with self.writer() as db:
+            cursor = await db.executemany(sql, rows)
+            rowcount = cursor.rowcount
+            await cursor.close()
+            return rowcount
+
+    async def executescript(self, script: str):
+        """
+        Voer een SQL script uit via de writer connectie
+        """
+        async with self.writer() as db:
+            await db.executescript(script)
+
+    async def ensure_columns(self, table: str, columns: dict):
+        """
+        Voeg kolommen toe die in een bestaande database nog ontbreken
+
+        CREATE TABLE IF NOT EXISTS past een bestaande tabel niet aan, dus nieuwe
+        kolommen uit database_setup.sql worden hier met ALTER TABLE toegevoegd.
+        """
+        rows = await self.fetchall(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in rows}
+        missing = [(name, definition) for name, definition in columns.items() if name not in existing]
+        if not missing:
+            return
+
+        async with self.writer() as db:
+            for name, definition in missing:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        logger.info(f"Kolommen toegevoegd aan {table}: {', '.join(name for name, _ in missing)}")
@@ -31,6 +31,7 @@ CREATE TABLE IF NOT EXISTS servers (
     rcon_password TEXT,
     required_level INTEGER DEFAULT 1,
     discord_channel_id TEXT,  -- Voor status updates
+    log_source TEXT DEFAULT 'auto',  -- watchdog, poll (NFS/SMB) of auto
     active BOOLEAN DEFAULT TRUE,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
@@ -67,8 +68,58 @@ CREATE TABLE IF NOT EXISTS discord_levels (
     FOREIGN KEY (discord_id) REFERENCES users(discord_id)
 );
 
+-- Activity rollups - tellingen per uur en per dag, per server, actie en speler
+-- Worden bij elke flush van de activity log bijgewerkt, zodat statistieken
+-- nooit de volledige activity_log hoeven te scannen
+CREATE TABLE IF NOT EXISTS activity_rollup_hourly (
+    bucket TEXT NOT NULL,  -- 'YYYY-MM-DD HH:00:00' (UTC)
+    server_id INTEGER NOT NULL DEFAULT 0,  -- 0 = onbekende server
+    action TEXT NOT NULL,
+    game_username TEXT NOT NULL DEFAULT '',
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, server_id, action, game_username)
+);
+
+CREATE TABLE IF NOT EXISTS activity_rollup_daily (
+    bucket TEXT NOT NULL,  -- 'YYYY-MM-DD' (UTC)
+    server_id INTEGER NOT NULL DEFAULT 0,
+    action TEXT NOT NULL,
+    game_username TEXT NOT NULL DEFAULT '',
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, server_id, action, game_username)
+);
+
+-- Eenmalig vullen vanuit een bestaande activity_log (alleen als de rollups nog leeg zijn)
+INSERT INTO activity_rollup_hourly (bucket, server_id, action, game_username, count)
+SELECT strftime('%Y-%m-%d %H:00:00', timestamp), COALESCE(server_id, 0), action, COALESCE(game_username, ''), COUNT(*)
+FROM activity_log
+WHERE NOT EXISTS (SELECT 1 FROM activity_rollup_hourly)
+GROUP BY 1, 2, 3, 4;
+
+INSERT INTO activity_rollup_daily (bucket, server_id, action, game_username, count)
+SELECT strftime('%Y-%m-%d', timestamp), COALESCE(server_id, 0), action, COALESCE(game_username, ''), COUNT(*)
+FROM activity_log
+WHERE NOT EXISTS (SELECT 1 FROM activity_rollup_daily)
+GROUP BY 1, 2, 3, 4;
+
+-- Log checkpoints - tot waar het log van elke server gelezen is, plus de
+-- identiteit van het bestand, zodat de bot na een herstart verder kan lezen
+CREATE TABLE IF NOT EXISTS log_checkpoints (
+    server_name TEXT PRIMARY KEY,
+    log_path TEXT NOT NULL,
+    device INTEGER,
+    inode INTEGER,
+    file_size INTEGER,
+    position INTEGER NOT NULL,
+    head_length INTEGER,
+    head_hash TEXT,  -- sha1 van de eerste bytes, herkent rotatie bij hergebruikte inodes
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Indexes voor betere performance
 CREATE INDEX IF NOT EXISTS idx_game_accounts_discord_game ON game_accounts(discord_id, game_type);
 CREATE INDEX IF NOT EXISTS idx_activity_log_timestamp ON activity_log(timestamp);
 CREATE INDEX IF NOT EXISTS idx_servers_game_type ON servers(game_type);
 CREATE INDEX IF NOT EXISTS idx_discord_levels_level ON discord_levels(current_level);
+CREATE INDEX IF NOT EXISTS idx_rollup_hourly_server ON activity_rollup_hourly(server_id, bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_daily_server ON activity_rollup_daily(server_id, bucket);
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""
+Ingest Workers
+=============
+
+Optionele worker processen die log bestanden volgen en parsen, verdeeld
+over groepen servers. Handig als een enkele Python thread het lezen en
+parsen van veel drukke logs niet bijhoudt.
+
+Elke worker stuurt compacte tuples per batch terug over een eigen pipe,
+samen met het checkpoint (positie en identiteit) van het log.
+De bot zet ze om naar LogEvents en geeft ze aan GameLogMonitor.submit_event,
+zodat de rest van de pipeline hetzelfde blijft. Een worker die crasht wordt
+met backoff opnieuw gestart en gaat verder vanaf de laatst doorgegeven
+positie in elk log.
+
+Aanzetten met INGEST_WORKERS=<aantal> (0 = alles in het bot proces).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import logging
+from multiprocessing.connection import wait
+
+from latency_tracing import EventTrace
+from log_monitor import EventTypes, GameLogParser, LogEvent, LogFileHandler, LogWatchers, intern_type
+
+logger = logging.getLogger(__name__)
+
+class _ShardHandler(LogFileHandler):
+    """
+    LogFileHandler in een worker, stuurt per gelezen blok een batch terug
+    """
+
+    def __init__(self, server_name: str, game_type: str, log_path: str, start_position: int, send):
+        self.server_name = server_name
+        self.pending = []
+        self.send = send
+        self.sent_position = start_position
+        super().__init__(GameLogParser(game_type), self._collect, log_path, start_position)
+
+    def _collect(self, event: LogEvent, trace: EventTrace):
+        self.pending.append((
+            event.event_type, event.player_name, event.timestamp, event.message,
+            trace.started, tuple(trace.durations.items())
+        ))
+
+    def process(self):
+        super().process()
+        checkpoint = self.tailer.checkpoint()
+        if checkpoint is None:
+            return
+        position = checkpoint[3]
+        if self.pending or position != self.sent_position:
+            batch, self.pending = self.pending, []
+            self.sent_position = position
+            self.send((self.server_name, checkpoint, batch))
+
+def _worker_main(control, results):
+    """
+    Hoofdlus van een worker proces: voer add/remove commando's uit
+    """
+    # Ctrl+C is voor het bot proces, dat stopt de workers netjes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    watchers = LogWatchers()
+    handlers = {}
+    send_lock = threading.Lock()
+
+    def send(item):
+        # Observer en poller threads kunnen tegelijk een batch versturen
+        with send_lock:
+            results.send(item)
+
+    try:
+        while True:
+            try:
+                command = control.recv()
+            except EOFError:
+                break
+            if command is None:
+                break
+
+            action, server_name = command[0], command[1]
+            if action == 'add':
+                _, _, game_type, log_path, source, position = command
+                handler = _ShardHandler(server_name, game_type, log_path, position, send)
+                # Eerst inlezen wat er sinds de positie bijgekomen is: daarna leest
+                # alleen de observer of poller thread, LogTailer is niet thread-safe
+                handler.process()
+                watchers.add(log_path, handler, source)
+                handlers[server_name] = (log_path, source, handler)
+            elif action == 'remove' and server_name in handlers:
+                log_path, source, handler = handlers.pop(server_name)
+                watchers.remove(log_path, handler, source)
+                handler.close()
+    finally:
+        watchers.stop()
+        for _, _, handler in handlers.values():
+            handler.close()
+
+class IngestWorkerPool:
+    """
+    Verdeelt servers over worker processen en bewaakt die processen
+    """
+
+    def __init__(self, monitor, worker_count: int = None, backoff_base: float = None, backoff_max: float = None):
+        self.monitor = monitor
+        self.worker_count = worker_count or int(os.getenv('INGEST_WORKERS', 0))
+        self.backoff_base = backoff_base or float(os.getenv('INGEST_BACKOFF_BASE', 1))
+        self.backoff_max = backoff_max or float(os.getenv('INGEST_BACKOFF_MAX', 60))
+        # spawn: geen fork van een proces met watchdog, aiosqlite en asyncio threads
+        self.context = multiprocessing.get_context('spawn')
+
+        self.servers = {}     # server_name -> (worker id, game_type, log_path, source)
+        self.positions = {}   # server_name -> laatst doorgegeven positie
+        self.workers = {}     # worker id -> {'process', 'control', 'results', 'restarts', 'retry_at'}
+        self.stats = {'batches': 0, 'events': 0, 'restarts': 0}
+
+        self._connections = {}    # results connectie -> worker id (copy-on-write)
+        self._event_types = {event_type: event_type for event_type in EventTypes.ALL + (EventTypes.RESTART,)}
+        self._game_types = {}
+        self._stopping = False
+        self._reader = None
+        self._supervisor = None
+
+    async def start(self):
+        """
+        Start de worker processen, de reader thread en de supervisor
+        """
+        if self._supervisor is not None:
+            return
+
+        self._stopping = False
+        loop = asyncio.get_running_loop()
+        for worker_id in range(self.worker_count):
+            self.workers[worker_id] = {'process': None, 'control': None, 'results': None,
+                                       'restarts': 0, 'retry_at': 0.0}
+            await loop.run_in_executor(None, self._spawn, worker_id)
+
+        self._reader = threading.Thread(target=self._read_results, name="ingest-reader", daemon=True)
+        self._reader.start()
+        self._supervisor = asyncio.create_task(self._supervise(), name="ingest-supervisor")
+        logger.info(f"{self.worker_count} ingest workers gestart")
+
+    async def stop(self):
+        """
+        Stop de supervisor, de workers en de reader thread
+        """
+        self._stopping = True
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            await asyncio.gather(self._supervisor, return_exceptions=True)
+            self._supervisor = None
+
+        await asyncio.get_running_loop().run_in_executor(None, self._stop_workers)
+
+        if self._reader is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._reader.join)
+            self._reader = None
+
+    def add_server(self, server_name: str, game_type: str, log_path: str, source: str, position: int = 0):
+        """
+        Wijs een server toe aan de minst belaste worker
+        """
+        if server_name in self.servers:
+            self.remove_server(server_name)
+
+        load = {worker_id: 0 for worker_id in self.workers}
+        for worker_id, _, _, _ in self.servers.values():
+            load[worker_id] += 1
+        worker_id = min(load, key=load.get)
+
+        self.servers[server_name] = (worker_id, game_type.lower(), log_path, source)
+        self.positions[server_name] = position
+        self._send(worker_id, ('add', server_name, game_type.lower(), log_path, source, position))
+        return worker_id
+
+    def remove_server(self, server_name: str):
+        """
+        Haal een server weg bij zijn worker
+        """
+        entry = self.servers.pop(server_name, None)
+        if entry is not None:
+            self._send(entry[0], ('remove', server_name))
+        self.positions.pop(server_name, None)
+
+    def _send(self, worker_id: int, command):
+        control = self.workers[worker_id]['control']
+        if control is None:
+            # Worker ligt eruit, bij de herstart krijgt hij zijn servers opnieuw
+            return
+        try:
+            control.send(command)
+        except (OSError, EOFError):
+            pass
+
+    def _spawn(self, worker_id: int):
+        """
+        Start een worker proces en geef het zijn servers (opnieuw) mee
+        """
+        worker = self.workers[worker_id]
+        control_recv, control_send = self.context.Pipe(duplex=False)
+        results_recv, results_send = self.context.Pipe(duplex=False)
+
+        process = self.context.Process(
+            target=_worker_main, args=(control_recv, results_send),
+            name=f"ingest-worker-{worker_id}", daemon=True
+        )
+        process.start()
+        # De kinderkant is nu van het proces, hier sluiten zodat EOF doorkomt
+        control_recv.close()
+        results_send.close()
+
+        worker.update(process=process, control=control_send, results=results_recv)
+        connections = dict(self._connections)
+        connections[results_recv] = worker_id
+        self._connections = connections
+
+        for server_name, (assigned, game_type, log_path, source) in list(self.servers.items()):
+            if assigned == worker_id:
+                self._send(worker_id, ('add', server_name, game_type, log_path, source,
+                                       self.positions.get(server_name, 0)))
+
+    def _read_results(self):
+        """
+        Reader thread: zet batches van de workers om naar events voor de monitor
+        """
+        while not self._stopping or self._connections:
+            connections = list(self._connections)
+            if not connections:
+                time.sleep(0.1)
+                continue
+
+            for connection in wait(connections, timeout=0.5):
+                try:
+                    server_name, checkpoint, batch = connection.recv()
+                except (EOFError, OSError):
+                    # Worker is gestopt of gecrasht, de supervisor start hem opnieuw
+                    connections = dict(self._connections)
+                    connections.pop(connection, None)
+                    self._connections = connections
+                    connection.close()
+                    continue
+
+                self._deliver(server_name, checkpoint, batch)
+
+    def _deliver(self, server_name: str, checkpoint: tuple, batch: list):
+        entry = self.servers.get(server_name)
+        if entry is None:
+            return
+        self.positions[server_name] = checkpoint[3]
+        self.monitor.bot.log_checkpoints.update(server_name, entry[2], checkpoint)
+        if not batch:
+            return
+
+        self.stats['batches'] += 1
+        self.stats['events'] += len(batch)
+        game_type = self._game_types.get(server_name)
+        if game_type is None:
+            game_type = self._game_types[server_name] = intern_type(self.servers[server_name][1])
+
+        for event_type, player_name, timestamp, message, started, durations in batch:
+            event = LogEvent(self._event_types.get(event_type, event_type), player_name, timestamp,
+                             game_type, message=message)
+            # CLOCK_MONOTONIC is systeembreed, dus de tijden uit de worker kloppen hier ook
+            trace = EventTrace(started)
+            trace.durations = dict(durations)
+            trace.last = started + sum(seconds for stage, seconds in durations if stage != 'fs_event')
+            self.monitor.submit_event(server_name, event, trace)
+
+    async def _supervise(self):
+        """
+        Start gecrashte workers opnieuw, met exponentiele backoff per worker
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            for worker_id, worker in self.workers.items():
+                process = worker['process']
+                if process is not None and process.is_alive():
+                    if worker['restarts'] and now - worker['retry_at'] > self.backoff_max:
+                        # Lang genoeg stabiel, backoff resetten
+                        worker['restarts'] = 0
+                    continue
+
+                if process is not None:
+                    logger.error(f"Ingest worker {worker_id} gestopt (exit code {process.exitcode}), herstart volgt")
+                    worker['control'].close()
+                    worker.update(process=None, control=None)
+                    delay = min(self.backoff_base * (2 ** worker['restarts']), self.backoff_max)
+                    worker['retry_at'] = now + delay
+
+                if now >= worker['retry_at']:
+                    worker['restarts'] += 1
+                    self.stats['restarts'] += 1
+                    await loop.run_in_executor(None, self._spawn, worker_id)
+                    logger.info(f"Ingest worker {worker_id} herstart ({worker['restarts']}e poging)")
+
+    def _stop_workers(self):
+        """
+        Vraag alle workers te stoppen en wacht (blokkerend) tot ze weg zijn
+        """
+        for worker in self.workers.values():
+            if worker['control'] is not None:
+                try:
+                    worker['control'].send(None)
+                except (OSError, EOFError):
+                    pass
+
+        for worker in self.workers.values():
+            process = worker['process']
+            if process is None:
+                continue
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            if worker['control'] is not None:
+                worker['control'].close()
+            worker.update(process=None, control=None)
@@ -0,0 +1,133 @@
+"""
+Kick Cooldown
+============
+
+Onthoudt welke spelers net gekickt zijn. Een speler die binnen de cooldown
+opnieuw joint wordt meteen uit het geheugen weer gekickt, zonder access
+check. Zulke herhaalde pogingen worden geteld in plaats van elk een eigen
+activity rij en notificatie te krijgen; per overtreder houdt een token
+bucket bij hoe vaak de opgespaarde telling gemeld mag worden.
+"""
+
+import os
+import time
+
+class DenyEntry:
+    """
+    Cooldown en meld-budget van een gekickte speler op een server
+    """
+
+    __slots__ = ('until', 'repeats', 'unreported', 'tokens', 'updated')
+
+    def __init__(self, until: float, tokens: float, now: float):
+        self.until = until
+        self.repeats = 0        # herhaalde joins sinds de eerste kick
+        self.unreported = 0     # nog niet gemelde herhaalde joins
+        self.tokens = tokens
+        self.updated = now
+
+class KickCooldown:
+    """
+    Deny cache per (server, speler) met een token bucket per overtreder
+    """
+
+    def __init__(self, cooldown: float = None, report_rate: int = None, report_per: float = None):
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv('KICK_COOLDOWN_SECONDS', 300))
+        # Maximaal `report_rate` meldingen per `report_per` seconden per overtreder
+        self.report_rate = report_rate or int(os.getenv('KICK_REPORT_RATE', 1))
+        self.report_per = report_per or float(os.getenv('KICK_REPORT_PER', 60))
+
+        self.denied = {}    # (server_name, player_name) -> DenyEntry
+        self.stats = {'denied': 0, 'repeats': 0, 'reports': 0}
+
+    def is_denied(self, server_name: str, player_name: str) -> bool:
+        """
+        True als de speler binnen de cooldown al gekickt is
+        """
+        if self.cooldown <= 0:
+            return False
+        entry = self.denied.get((server_name, player_name))
+        return entry is not None and time.monotonic() < entry.until
+
+    def deny(self, server_name: str, player_name: str):
+        """
+        Start (of verleng) de cooldown na een kick
+        """
+        if self.cooldown <= 0:
+            return
+        now = time.monotonic()
+        key = (server_name, player_name)
+        entry = self.denied.get(key)
+        if entry is None:
+            entry = self.denied[key] = DenyEntry(now + self.cooldown, float(self.report_rate), now)
+            self.stats['denied'] += 1
+            if len(self.denied) > 1000:
+                self._prune(now)
+        else:
+            entry.until = now + self.cooldown
+
+    def repeat(self, server_name: str, player_name: str) -> float:
+        """
+        Tel een herhaalde join die gekickt is
+
+        Geeft 0 terug als de telling nu gemeld mag worden, anders het aantal
+        seconden tot het volgende token. De cooldown schuift mee, zodat een
+        speler die blijft proberen in de cache blijft.
+        """
+        now = time.monotonic()
+        entry = self.denied.get((server_name, player_name))
+        if entry is None:
+            entry = self.denied[(server_name, player_name)] = DenyEntry(now, float(self.report_rate), now)
+        entry.until = now + self.cooldown
+        entry.repeats += 1
+        entry.unreported += 1
+        self.stats['repeats'] += 1
+
+        entry.tokens = min(self.report_rate, entry.tokens + (now - entry.updated) * self.report_rate / self.report_per)
+        entry.updated = now
+        if entry.tokens >= 1:
+            entry.tokens -= 1
+            return 0.0
+        return (1 - entry.tokens) * self.report_per / self.report_rate
+
+    def take_unreported(self, server_name: str, player_name: str) -> tuple:
+        """
+        Haal de opgespaarde telling op als (nog niet gemeld, totaal) en zet hem op nul
+        """
+        key = (server_name, player_name)
+        entry = self.denied.get(key)
+        if entry is None:
+            return 0, 0
+
+        count, entry.unreported = entry.unreported, 0
+        if count:
+            self.stats['reports'] += 1
+        if time.monotonic() >= entry.until:
+            del self.denied[key]
+        return count, entry.repeats
+
+    def forget(self, server_name: str, player_name: str):
+        self._release((server_name, player_name))
+
+    def forget_player(self, player_name: str):
+        """
+        Vergeet een speler op alle servers (bijv. na het koppelen van zijn account)
+        """
+        for key in [key for key in self.denied if key[1] == player_name]:
+            self._release(key)
+
+    def _release(self, key: tuple):
+        # Een openstaande telling wordt nog gemeld, de speler is alleen niet meer geweigerd
+        entry = self.denied.get(key)
+        if entry is None:
+            return
+        if entry.unreported:
+            entry.until = 0.0
+        else:
+            del self.denied[key]
+
+    def _prune(self, now: float):
+        # Entries met een openstaande telling blijven tot die gemeld is
+        expired = [key for key, entry in self.denied.items() if now >= entry.until and not entry.unreported]
+        for key in expired:
+            del self.denied[key]
@@ -0,0 +1,146 @@
+"""
+Latency Tracing
+==============
+
+Meet per event hoeveel tijd elke stap in de pipeline kost, van het
+filesystem event tot de kick en de Discord notificatie.
+Per server worden rollende percentielen (p50/p95/p99) bijgehouden en
+trage events apart gelogd.
+"""
+
+import os
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Stappen in de volgorde waarin ze doorlopen worden
+STAGES = (
+    'fs_event',       # van schrijven van het log tot het watchdog event
+    'read',
+    'parse',
+    'queue',
+    'access_check',
+    'chat_check',
+    'kick',
+    'log_action',
+    'notify',
+    'join_to_kick',   # van watchdog event tot uitgevoerde kick
+    'total',
+)
+
+class EventTrace:
+    """
+    Monotonic tijdstempels voor een enkel event
+    """
+
+    __slots__ = ('started', 'last', 'durations')
+
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.monotonic()
+        self.last = self.started
+        self.durations = {}
+
+    def mark(self, stage: str):
+        """
+        Sluit een stap af, de duur is de tijd sinds de vorige stap
+        """
+        now = time.monotonic()
+        self.durations[stage] = now - self.last
+        self.last = now
+
+    def add(self, stage: str, seconds: float):
+        """
+        Registreer een duur die los gemeten is
+        """
+        self.durations[stage] = seconds
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def copy(self) -> 'EventTrace':
+        trace = EventTrace(self.started)
+        trace.last = self.last
+        trace.durations = dict(self.durations)
+        return trace
+
+class _NullTrace(EventTrace):
+    """
+    Trace die niets bijhoudt, voor events die niet uit een live log komen
+    """
+
+    __slots__ = ()
+
+    def mark(self, stage: str):
+        pass
+
+    def add(self, stage: str, seconds: float):
+        pass
+
+NULL_TRACE = _NullTrace()
+
+class LatencyTracker:
+    """
+    Rollende latency histogrammen per server en stap
+    """
+
+    def __init__(self, window: int = None, slow_threshold_ms: float = None):
+        self.window = window or int(os.getenv('LATENCY_WINDOW', 1000))
+        self.slow_threshold = (slow_threshold_ms or float(os.getenv('LATENCY_SLOW_MS', 500))) / 1000
+        self.samples = {}                     # server_name -> {stage: deque}
+        self.slow_events = deque(maxlen=50)
+
+    def record(self, server_name: str, stage: str, seconds: float):
+        """
+        Voeg een meting toe (thread-safe, deque.append is atomair)
+        """
+        stages = self.samples.get(server_name)
+        if stages is None:
+            stages = self.samples.setdefault(server_name, {})
+        samples = stages.get(stage)
+        if samples is None:
+            samples = stages.setdefault(stage, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def finish(self, server_name: str, event, trace: EventTrace):
+        """
+        Sla alle stappen van een afgehandeld event op
+        """
+        if trace is NULL_TRACE:
+            return
+
+        trace.durations['total'] = trace.elapsed()
+        for stage, seconds in trace.durations.items():
+            self.record(server_name, stage, seconds)
+
+        if trace.durations['total'] > self.slow_threshold:
+            breakdown = {stage: round(seconds * 1000, 1) for stage, seconds in trace.durations.items()}
+            self.slow_events.append({
+                'server': server_name,
+                'event_type': event.event_type,
+                'player': event.player_name,
+                'at': time.time(),
+                'ms': breakdown,
+            })
+            logger.warning(f"[{server_name}] Traag event {event}: {breakdown}")
+
+    def percentiles(self, server_name: str) -> dict:
+        """
+        Geef per stap (p50, p95, p99, aantal) in milliseconden terug
+        """
+        result = {}
+        stages = self.samples.get(server_name, {})
+        for stage in STAGES:
+            samples = stages.get(stage)
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            count = len(ordered)
+            result[stage] = tuple(
+                round(ordered[min(count - 1, int(q * count))] * 1000, 1) for q in (0.50, 0.95, 0.99)
+            ) + (count,)
+        return result
+
+    def servers(self) -> list:
+        return sorted(self.samples)
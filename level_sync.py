@@ -0,0 +1,166 @@
+"""
+Discord Level Sync
+=================
+
+Houdt de discord_levels tabel bij op basis van de rollen van leden.
+Level bots zoals MEE6 geven leden rollen als "Level 5"; het hoogste level
+in die rollen is het Discord level van een gebruiker.
+
+Een volledige sync berekent de levels van de hele guild, vergelijkt ze met
+een snapshot in het geheugen en schrijft alleen de gewijzigde rijen weg
+in een enkele executemany. Tussen de volledige syncs komen updates
+incrementeel binnen via on_member_update.
+"""
+
+import asyncio
+import os
+import re
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class LevelSynchronizer:
+    """
+    Synchroniseert Discord levels naar de database en de access index
+    """
+
+    UPSERT_SQL = """INSERT INTO discord_levels (discord_id, current_level, last_updated)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(discord_id) DO UPDATE SET
+                        current_level = excluded.current_level,
+                        last_updated = excluded.last_updated"""
+
+    def __init__(self, bot, interval: float = None, role_pattern: str = None):
+        self.bot = bot
+        self.interval = interval or float(os.getenv('LEVEL_CHECK_INTERVAL', 300))
+        self.role_pattern = re.compile(
+            role_pattern or os.getenv('LEVEL_ROLE_PATTERN', r'^level\s*(\d+)$'), re.IGNORECASE
+        )
+        self.snapshot = {}   # discord_id -> level zoals het in de database staat
+        self._task = None
+
+    async def load_snapshot(self):
+        """
+        Laad de huidige levels uit de database
+        """
+        rows = await self.bot.db.fetchall("SELECT discord_id, current_level FROM discord_levels")
+        self.snapshot = {discord_id: level or 0 for discord_id, level in rows}
+
+    def start(self):
+        """
+        Start de periodieke volledige sync
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="level-sync")
+
+    async def stop(self):
+        """
+        Stop de periodieke sync
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def guilds(self) -> list:
+        """
+        De guilds waarvan levels gelezen worden (de geconfigureerde, anders alle)
+        """
+        if self.bot.guild_id:
+            guild = self.bot.get_guild(self.bot.guild_id)
+            return [guild] if guild else []
+        return list(self.bot.guilds)
+
+    def compute_level(self, member: discord.Member) -> int:
+        """
+        Bepaal het level van een lid uit zijn rollen
+        """
+        level = 0
+        for role in member.roles:
+            match = self.role_pattern.match(role.name)
+            if match:
+                level = max(level, int(match.group(1)))
+        return level
+
+    async def full_sync(self) -> int:
+        """
+        Bereken alle levels en schrijf alleen de wijzigingen weg
+        """
+        levels = {}
+        complete = True
+        for guild in self.guilds():
+            if not guild.chunked:
+                await guild.chunk()
+            complete = complete and guild.chunked
+            for member in guild.members:
+                if member.bot:
+                    continue
+                discord_id = str(member.id)
+                levels[discord_id] = max(levels.get(discord_id, 0), self.compute_level(member))
+
+        # Geen rij betekent level 0, dus leden zonder level hoeven niet weg
+        changed = {
+            discord_id: level for discord_id, level in levels.items()
+            if self.snapshot.get(discord_id, 0) != level
+        }
+
+        if complete:
+            # Leden die de guild verlaten hebben verliezen hun level
+            for discord_id, level in self.snapshot.items():
+                if discord_id not in levels and level:
+                    changed[discord_id] = 0
+
+        await self._write(changed)
+        return len(changed)
+
+    async def update_member(self, member: discord.Member):
+        """
+        Incrementele update voor een enkel lid (vanuit on_member_update)
+        """
+        if member.bot:
+            return
+
+        level = 0
+        for guild in self.guilds():
+            guild_member = guild.get_member(member.id)
+            if guild_member is not None:
+                level = max(level, self.compute_level(guild_member))
+
+        discord_id = str(member.id)
+        if self.snapshot.get(discord_id, 0) != level:
+            await self._write({discord_id: level})
+
+    async def _write(self, changed: dict):
+        """
+        Schrijf gewijzigde levels in een executemany en werk snapshot en index bij
+        """
+        if not changed:
+            return
+
+        await self.bot.db.executemany(self.UPSERT_SQL, list(changed.items()))
+        self.snapshot.update(changed)
+        for discord_id, level in changed.items():
+            self.bot.access_index.set_level(discord_id, level)
+        # De gekoppelde spelers van deze gebruikers worden bij hun volgende join
+        # opnieuw gecontroleerd, ook als ze nog online of in de kick cooldown zijn
+        monitor = self.bot.log_monitor
+        for discord_id in changed:
+            for game_username in self.bot.access_index.usernames(discord_id):
+                monitor.roster.expire_player(game_username)
+                monitor.kick_cooldown.forget_player(game_username)
+
+        logger.info(f"Discord levels gesynchroniseerd: {len(changed)} gewijzigd")
+
+    async def _run(self):
+        """
+        Volledige sync bij het opstarten en daarna elk LEVEL_CHECK_INTERVAL
+        """
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await self.full_sync()
+            except Exception as e:
+                logger.error(f"Error syncing Discord levels: {e}")
+            await asyncio.sleep(self.interval)
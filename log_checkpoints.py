@@ -0,0 +1,145 @@
+"""
+Log Checkpoints
+==============
+
+Slaat per server op tot waar het log gelezen is, samen met de identiteit
+van het bestand (inode, grootte en een hash van het begin). Na een herstart
+leest de bot verder vanaf die positie, of begint aan het einde als het
+bestand intussen geroteerd of ingekort is.
+
+Posities komen na elke read binnen maar worden gethrottled weggeschreven,
+met een enkele executemany per interval.
+"""
+
+import asyncio
+import hashlib
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LogCheckpointStore:
+    """
+    Bewaart log posities per server in de log_checkpoints tabel
+    """
+
+    UPSERT_SQL = """INSERT INTO log_checkpoints
+                    (server_name, log_path, device, inode, file_size, position, head_length, head_hash, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(server_name) DO UPDATE SET
+                        log_path = excluded.log_path,
+                        device = excluded.device,
+                        inode = excluded.inode,
+                        file_size = excluded.file_size,
+                        position = excluded.position,
+                        head_length = excluded.head_length,
+                        head_hash = excluded.head_hash,
+                        updated_at = excluded.updated_at"""
+
+    def __init__(self, db, interval: float = None):
+        self.db = db
+        self.interval = interval or float(os.getenv('LOG_CHECKPOINT_INTERVAL', 5))
+
+        self.saved = {}      # server_name -> rij zoals in de database
+        self.pending = {}    # server_name -> (log_path, checkpoint) nog weg te schrijven
+        self._task = None
+
+    async def load(self):
+        """
+        Laad alle opgeslagen checkpoints
+        """
+        rows = await self.db.fetchall(
+            """SELECT server_name, log_path, device, inode, file_size, position, head_length, head_hash
+               FROM log_checkpoints"""
+        )
+        self.saved = {row[0]: row[1:] for row in rows}
+
+    def start(self):
+        """
+        Start het periodiek wegschrijven
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="log-checkpoints")
+
+    async def stop(self):
+        """
+        Stop de flusher en schrijf de laatste posities weg
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def update(self, server_name: str, log_path: str, checkpoint):
+        """
+        Onthoud de laatste positie (thread-safe, wordt vanuit de lees threads aangeroepen)
+        """
+        if checkpoint is not None:
+            self.pending[server_name] = (log_path, checkpoint)
+
+    def resume_position(self, server_name: str, log_path: str) -> int:
+        """
+        Bepaal waar het lezen moet beginnen (blokkerend, doet een stat en een kleine read)
+
+        Verder vanaf het checkpoint als het nog hetzelfde bestand is, anders
+        aan het einde: een oud of geroteerd log opnieuw verwerken zou spelers
+        kicken voor joins van lang geleden. Gebruik log_replay voor backfill.
+        """
+        stat = os.stat(log_path)
+        saved = self.saved.get(server_name)
+        if saved is None:
+            return stat.st_size
+
+        saved_path, _, inode, _, position, head_length, head_hash = saved
+        if saved_path != log_path:
+            logger.info(f"[{server_name}] Ander log pad dan in het checkpoint, begin aan het einde")
+            return stat.st_size
+        if inode != stat.st_ino or position > stat.st_size:
+            logger.info(f"[{server_name}] Log is geroteerd of ingekort sinds het checkpoint, begin aan het einde")
+            return stat.st_size
+
+        # Inodes worden hergebruikt (en op NFS is het device niet stabiel),
+        # dus het begin van het bestand moet ook nog hetzelfde zijn
+        with open(log_path, 'rb') as f:
+            head = f.read(head_length or 0)
+        if len(head) != (head_length or 0) or hashlib.sha1(head).hexdigest() != head_hash:
+            logger.info(f"[{server_name}] Begin van het log is veranderd, begin aan het einde")
+            return stat.st_size
+
+        logger.info(f"[{server_name}] Verder lezen vanaf checkpoint ({stat.st_size - position} bytes in te halen)")
+        return position
+
+    async def flush(self):
+        """
+        Schrijf alle gewijzigde posities in een executemany weg
+        """
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, {}
+        rows = []
+        # list() omdat een lees thread net nog in de oude dict kan schrijven
+        for server_name, (log_path, checkpoint) in list(pending.items()):
+            row = (log_path,) + tuple(checkpoint)
+            if self.saved.get(server_name) != row:
+                rows.append((server_name,) + row)
+        if not rows:
+            return
+
+        try:
+            await self.db.executemany(self.UPSERT_SQL, rows)
+        except Exception as e:
+            logger.error(f"Error saving log checkpoints: {e}")
+            # Terugzetten, tenzij er intussen een nieuwere positie is
+            for server_name, item in list(pending.items()):
+                self.pending.setdefault(server_name, item)
+            return
+
+        for row in rows:
+            self.saved[row[0]] = row[1:]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
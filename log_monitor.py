@@ -7,13 +7,22 @@ Detecteert join/leave events en controleert toegangsrechten.
 """
 
 import asyncio
+import hashlib
+import heapq
 import re
 import os
-from datetime import datetime
+import sys
+import threading
+import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import logging
 
+from latency_tracing import EventTrace, LatencyTracker, NULL_TRACE
+from chat_moderation import CHAT_KICK_REASON
+from kick_cooldown import KickCooldown
+from player_roster import PlayerRoster
+
 logger = logging.getLogger(__name__)
 
 class GameLogPatterns:
@@ -51,17 +60,74 @@ class GameLogPatterns:
         'chat': r'\[([\d\-:\s]+)\].*([\w]+): (.+)'
     }
 
+    # Letterlijke stukken tekst die in elke match van het pattern voorkomen.
+    # Regels zonder een van deze stukken kunnen nooit matchen en worden
+    # afgewezen zonder dat er een regex hoeft te draaien.
+    PREFILTERS = {
+        'MINECRAFT': {'join': ' joined the game', 'leave': ' left the game', 'chat': ']: <'},
+        'PALWORLD': {'join': 'PlayerConnected: ', 'leave': 'PlayerDisconnected: ', 'chat': 'PlayerChat: '},
+        'BEAMNG': {'join': '[CONNECT] ', 'leave': '[DISCONNECT] ', 'chat': '[CHAT] '},
+        'VALHEIM': {'join': 'Got character ZDOID from ', 'leave': 'Closing socket ', 'chat': 'Say: '},
+        'ARK': {'join': ' joined the ARK', 'leave': ' left the ARK', 'chat': ': '},
+    }
+
+class EventTypes:
+    """
+    Vaste event types, gedeeld door alle LogEvents
+    """
+
+    JOIN = 'join'
+    LEAVE = 'leave'
+    CHAT = 'chat'
+    # Geen log regel: het log is nieuw of ingekort, meestal een herstart van de server
+    RESTART = 'restart'
+
+    ALL = (JOIN, LEAVE, CHAT)
+
+def intern_type(name: str) -> str:
+    """
+    Geef een gedeelde string terug voor een event of game type
+
+    Zo wijzen alle events naar dezelfde paar strings in plaats van elk een
+    eigen kopie uit de regex of de configuratie.
+    """
+    return sys.intern(name)
+
 class LogEvent:
     """
     Representeert een log event
+
+    Events worden per log regel aangemaakt, dus ze zijn klein gehouden:
+    slots in plaats van een __dict__ en extra_data wordt pas aangemaakt als
+    iemand erom vraagt. Het chat bericht heeft een eigen slot.
     """
 
-    def __init__(self, event_type: str, player_name: str, timestamp: str, game_type: str, extra_data: dict = None):
-        self.event_type = event_type  # 'join', 'leave', 'chat'
+    __slots__ = ('event_type', 'player_name', 'timestamp', 'game_type', 'message', '_extra_data')
+
+    def __init__(self, event_type: str, player_name: str, timestamp: str, game_type: str,
+                 extra_data: dict = None, message: str = None):
+        self.event_type = event_type  # EventTypes.JOIN, LEAVE of CHAT
         self.player_name = player_name
         self.timestamp = timestamp
         self.game_type = game_type
-        self.extra_data = extra_data or {}
+        if extra_data and message is None:
+            message = extra_data.get('message')
+        self.message = message
+        self._extra_data = extra_data or None
+
+    @property
+    def extra_data(self) -> dict:
+        """
+        Extra velden van het event, pas aangemaakt bij het eerste gebruik
+        """
+        if self._extra_data is None:
+            self._extra_data = {} if self.message is None else {'message': self.message}
+        return self._extra_data
+
+    @extra_data.setter
+    def extra_data(self, value: dict):
+        self._extra_data = value
+        self.message = value.get('message') if value else None
 
     def __repr__(self):
         return f"LogEvent({self.event_type}, {self.player_name}, {self.game_type})"
@@ -69,46 +135,382 @@ class LogEvent:
 class GameLogParser:
     """
     Parser voor gameserver logs
+
+    Alle patterns van een game worden samengevoegd tot een enkele
+    gecompileerde regex, zodat elke regel maar een keer gescand wordt.
     """
 
     def __init__(self, game_type: str):
-        self.game_type = game_type.lower()
+        self.game_type = intern_type(game_type.lower())
         self.patterns = getattr(GameLogPatterns, game_type.upper(), {})
 
+        literals = GameLogPatterns.PREFILTERS.get(game_type.upper(), {})
+        # Alleen filteren als elk event type een literal heeft, anders
+        # zouden we regels kunnen weggooien die wel matchen
+        if self.patterns and all(event_type in literals for event_type in self.patterns):
+            self.prefilter = tuple(literals[event_type] for event_type in self.patterns)
+        else:
+            self.prefilter = None
+
+        self.matcher, self.group_slices = self._compile(self.patterns)
+        # match.lastgroup -> gedeelde event type string
+        self.event_types = {event_type: intern_type(event_type) for event_type in self.patterns}
+
+        # Dezelfde matcher en prefilter voor ruwe bytes uit het log bestand
+        self.bytes_prefilter = (
+            tuple(literal.encode('utf-8') for literal in self.prefilter)
+            if self.prefilter is not None else None
+        )
+        self.bytes_matcher, _ = self._compile({
+            event_type: self._bytes_pattern(pattern) for event_type, pattern in self.patterns.items()
+        })
+
+    @staticmethod
+    def _compile(patterns: dict):
+        """
+        Bouw een gecombineerde matcher met een named group per event type
+
+        Elk pattern staat in een lookahead vanaf het begin van de regel. Zo
+        blijft de volgorde van de patterns bepalend (join gaat voor chat),
+        net als bij het los proberen van elk pattern met re.search.
+        """
+        if not patterns:
+            return None, {}
+
+        alternatives = []
+        group_slices = {}
+        group_index = 0
+        for event_type, pattern in patterns.items():
+            inner_groups = re.compile(pattern).groups
+            # +1 voor de named group zelf
+            group_index += 1
+            group_slices[event_type] = (group_index, group_index + inner_groups)
+            group_index += inner_groups
+            if isinstance(pattern, bytes):
+                alternatives.append(b"(?=.*?(?P<%s>%s))" % (event_type.encode('ascii'), pattern))
+            else:
+                alternatives.append(f"(?=.*?(?P<{event_type}>{pattern}))")
+
+        if isinstance(alternatives[0], bytes):
+            return re.compile(b"|".join(alternatives)), group_slices
+        return re.compile("|".join(alternatives)), group_slices
+
+    @staticmethod
+    def _bytes_pattern(pattern: str) -> bytes:
+        """
+        Zet een str pattern om naar een bytes pattern
+
+        In bytes mode is \\w alleen ASCII. Spelersnamen met bijv. accenten
+        bestaan in UTF-8 uit bytes >= 0x80, die laten we ook toe zodat de
+        bytes matcher dezelfde namen vindt als de str matcher.
+        """
+        return pattern.replace('[\\w]', '[\\w\\x80-\\xff]').encode('utf-8')
+
     def parse_line(self, line: str) -> LogEvent:
         """
         Parse een enkele log regel
         """
-        for event_type, pattern in self.patterns.items():
-            match = re.search(pattern, line)
+        if self.matcher is None:
+            return None
+
+        if self.prefilter is not None:
+            for literal in self.prefilter:
+                if literal in line:
+                    break
+            else:
+                return None
+
+        match = self.matcher.match(line)
+        if not match:
+            return None
+
+        return self._build_event(match)
+
+    def parse_lines(self, lines) -> list:
+        """
+        Parse een lijst log regels en geef alleen de gematchte events terug
+
+        Regels worden gestript en lege regels overgeslagen, net als bij het
+        lezen van een log bestand.
+        """
+        return list(self.iter_events(lines))
+
+    def parse_chunk(self, text: str) -> list:
+        """
+        Parse een blok tekst met meerdere regels in een keer
+        """
+        return list(self.iter_events(text.splitlines()))
+
+    def parse_bytes(self, data: bytes) -> list:
+        """
+        Parse ruwe bytes uit een log bestand zonder alles te decoderen
+
+        In plaats van elke regel los te testen zoeken we de prefilter
+        literals in het hele blok en knippen alleen de regels eromheen uit.
+        Die worden met de bytes matcher doorzocht en alleen de gevangen
+        velden van een match worden naar str omgezet.
+        """
+        matcher = self.bytes_matcher
+        if matcher is None or not data:
+            return []
+
+        if self.bytes_prefilter is None:
+            lines = data.split(b'\n')
+        else:
+            lines = self._candidate_lines(data)
+
+        match_line = matcher.match
+        build_event = self._build_event_bytes
+        events = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            match = match_line(line)
             if match:
-                groups = match.groups()
-                timestamp = groups[0]
-                player_name = groups[1]
+                events.append(build_event(match))
+        return events
+
+    def _candidate_lines(self, data: bytes) -> list:
+        """
+        Geef de regels terug waarin een van de prefilter literals voorkomt, op volgorde
+        """
+        find = data.find
+        rfind = data.rfind
+        size = len(data)
+        spans = set()
+
+        for literal in self.bytes_prefilter:
+            index = find(literal)
+            while index != -1:
+                start = rfind(b'\n', 0, index) + 1
+                end = find(b'\n', index)
+                if end == -1:
+                    end = size
+                spans.add((start, end))
+                index = find(literal, end)
+
+        return [data[start:end] for start, end in sorted(spans)]
+
+    def iter_events(self, lines):
+        """
+        Generator die events lazy uit een iterable van regels haalt
+        """
+        matcher = self.matcher
+        if matcher is None:
+            return
+
+        # Lokale namen scheelen attribute lookups in de loop
+        prefilter = self.prefilter
+        match_line = matcher.match
+        build_event = self._build_event
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if prefilter is not None:
+                for literal in prefilter:
+                    if literal in line:
+                        break
+                else:
+                    continue
+
+            match = match_line(line)
+            if match:
+                yield build_event(match)
+
+    def _build_event(self, match) -> LogEvent:
+        """
+        Maak een LogEvent van een match van de gecombineerde regex
+        """
+        name = match.lastgroup
+        first, last = self.group_slices[name]
+        groups = match.groups()[first:last]
+        event_type = self.event_types[name]
+
+        message = None
+        if event_type is EventTypes.CHAT and len(groups) > 2:
+            message = groups[2]
+
+        return LogEvent(event_type, groups[1], groups[0], self.game_type, message=message)
+
+    def _build_event_bytes(self, match) -> LogEvent:
+        """
+        Maak een LogEvent van een bytes match, alleen de velden worden gedecodeerd
+        """
+        name = match.lastgroup
+        first, last = self.group_slices[name]
+        groups = match.groups()[first:last]
+        event_type = self.event_types[name]
+
+        message = None
+        if event_type is EventTypes.CHAT and len(groups) > 2:
+            message = groups[2].decode('utf-8', errors='ignore')
+
+        return LogEvent(
+            event_type,
+            groups[1].decode('utf-8', errors='ignore'),
+            groups[0].decode('ascii', errors='ignore'),
+            self.game_type,
+            message=message
+        )
+
+class LogTailer:
+    """
+    Volgt een log bestand met een open file handle
 
-                extra_data = {}
-                if event_type == 'chat' and len(groups) > 2:
-                    extra_data['message'] = groups[2]
+    Leest nieuwe data in binaire chunks en houdt een half geschreven laatste
+    regel vast tot de rest binnen is. Rotatie (nieuw inode) en truncatie
+    (bestand kleiner dan onze positie) worden gedetecteerd en netjes
+    afgehandeld.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    # Aantal bytes aan het begin van het bestand dat in een checkpoint gehasht wordt
+    HEAD_BYTES = 1024
+
+    def __init__(self, path: str, start_position: int = 0):
+        self.path = path
+        self.position = start_position
+        self._file = None
+        self._identity = None
+        self._partial = b''
+        self._head = None
+        self.last_mtime = None
+        self.last_size = None
+        # Gezet bij rotatie of truncatie, de handler meldt het en zet het terug
+        self.restarted = False
+
+    def open(self):
+        """
+        Open het bestand alvast, zodat een rotatie voor de eerste read niet gemist wordt
+        """
+        if self._file is None:
+            try:
+                self._open(os.stat(self.path))
+            except FileNotFoundError:
+                pass
+
+    def read_data(self) -> bytes:
+        """
+        Lees alle complete regels als ruwe bytes (zonder laatste newline)
+        """
+        lines = []
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Bestand is weg geroteerd en nog niet opnieuw aangemaakt,
+            # lees wat er nog in het oude bestand staat
+            stat = None
+        else:
+            self.last_mtime = stat.st_mtime
+            self.last_size = stat.st_size
+
+        if self._file is None:
+            if stat is None:
+                return b''
+            self._open(stat)
+        elif stat is not None and (stat.st_dev, stat.st_ino) != self._identity:
+            # Rotatie: eerst het oude bestand leeglezen, dan het nieuwe openen
+            self._read_into(lines)
+            if self._partial:
+                lines.append(self._partial)
+            self.close()
+            self.position = 0
+            self._open(stat)
+            self.restarted = True
+        elif stat is not None and stat.st_size < self.position:
+            # Truncatie: opnieuw beginnen vanaf het begin
+            logger.info(f"Log bestand ingekort, opnieuw lezen vanaf begin: {self.path}")
+            self._file.seek(0)
+            self.position = 0
+            self._partial = b''
+            self._head = None
+            self.restarted = True
+
+        self._read_into(lines)
+        return b'\n'.join(lines)
+
+    def checkpoint(self):
+        """
+        Positie en identiteit van het bestand voor een checkpoint
+
+        Geeft (device, inode, grootte, positie, head lengte, head hash) terug,
+        of None als het bestand niet open is. De positie is het begin van de
+        eerste nog niet complete regel, zodat die na een herstart opnieuw
+        gelezen wordt. Moet aangeroepen worden vanuit de thread die leest.
+        """
+        if self._file is None:
+            return None
+
+        if self._head is None or self._head[0] < self.HEAD_BYTES:
+            # Zolang het bestand kleiner is dan HEAD_BYTES groeit de head nog mee
+            self._file.seek(0)
+            head = self._file.read(self.HEAD_BYTES)
+            self._file.seek(self.position)
+            self._head = (len(head), hashlib.sha1(head).hexdigest())
 
-                return LogEvent(
-                    event_type=event_type,
-                    player_name=player_name,
-                    timestamp=timestamp,
-                    game_type=self.game_type,
-                    extra_data=extra_data
-                )
+        device, inode = self._identity
+        return (device, inode, self.last_size, self.position - len(self._partial)) + self._head
 
-        return None
+    def close(self):
+        """
+        Sluit de file handle
+        """
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._identity = None
+        self._partial = b''
+        self._head = None
+
+    def _open(self, stat):
+        """
+        Open het bestand en ga naar de opgeslagen positie
+        """
+        self._file = open(self.path, 'rb', buffering=0)
+        self._identity = (stat.st_dev, stat.st_ino)
+        self.last_size = stat.st_size
+        if self.position > stat.st_size:
+            self.position = 0
+        self._file.seek(self.position)
+
+    def _read_into(self, lines: list):
+        """
+        Lees tot het einde van het bestand en voeg blokken complete regels toe
+        """
+        while True:
+            chunk = self._file.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            self.position += len(chunk)
+
+            data = self._partial + chunk if self._partial else chunk
+            complete, newline, rest = data.rpartition(b'\n')
+            if newline:
+                # Complete regels eindigen op een newline, dus een UTF-8
+                # teken kan hier nooit half afgeknipt zijn
+                lines.append(complete)
+            self._partial = rest
 
 class LogFileHandler(FileSystemEventHandler):
     """
     Watchdog handler voor log bestanden
     """
 
-    def __init__(self, log_parser: GameLogParser, callback_func):
+    def __init__(self, log_parser: GameLogParser, callback_func, log_path: str, start_position: int = 0,
+                 checkpoint_func=None):
         self.parser = log_parser
         self.callback = callback_func
-        self.last_position = 0
+        # Krijgt na elke read de tailer.checkpoint(), voor het opslaan van de positie
+        self.checkpoint_func = checkpoint_func
+        self.tailer = LogTailer(log_path, start_position)
+        self.tailer.open()
+        # De eerste read na het starten kan tegelijk met een watchdog event lopen
+        self._lock = threading.Lock()
 
     def on_modified(self, event):
         """
@@ -116,120 +518,719 @@ class LogFileHandler(FileSystemEventHandler):
         """
         if event.is_directory:
             return
+        self.process()
+
+    def on_created(self, event):
+        """
+        Wordt aangeroepen wanneer het log bestand (na rotatie) opnieuw wordt aangemaakt
+        """
+        if event.is_directory:
+            return
+        self.process()
+
+    def process(self):
+        """
+        Lees nieuwe regels en stuur gematchte events door
+        """
+        with self._lock:
+            self._process()
 
+    def _process(self):
         try:
-            with open(event.src_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Ga naar de laatste bekende positie
-                f.seek(self.last_position)
+            trace = EventTrace()
+            data = self.tailer.read_data()
+            if not data:
+                return
+            trace.mark('read')
 
-                # Lees nieuwe regels
-                new_lines = f.readlines()
+            if self.tailer.last_mtime is not None:
+                # Vertraging tussen het schrijven van het log en dit event
+                trace.add('fs_event', max(0.0, time.time() - self.tailer.last_mtime))
 
-                # Update positie
-                self.last_position = f.tell()
+            # Parse alle nieuwe regels in een keer, direct op de bytes
+            events = self.parser.parse_bytes(data)
+            trace.mark('parse')
 
-                # Parse elke nieuwe regel
-                for line in new_lines:
-                    line = line.strip()
-                    if line:
-                        event = self.parser.parse_line(line)
-                        if event:
-                            # Roep callback aan met het event
-                            asyncio.create_task(self.callback(event))
+            if self.tailer.restarted:
+                # Via dezelfde queue, zodat het voor de joins uit het nieuwe log komt
+                self.tailer.restarted = False
+                self.callback(LogEvent(EventTypes.RESTART, None, None, self.parser.game_type), trace.copy())
+
+            for event in events:
+                # Geef het event door aan de event loop
+                self.callback(event, trace.copy())
+
+            if self.checkpoint_func is not None:
+                self.checkpoint_func(self.tailer.checkpoint())
 
         except Exception as e:
-            logger.error(f"Error reading log file {event.src_path}: {e}")
+            logger.error(f"Error reading log file {self.tailer.path}: {e}")
+
+    def close(self):
+        """
+        Sluit het gevolgde log bestand
+        """
+        self.tailer.close()
+
+class LogDirectoryDispatcher(FileSystemEventHandler):
+    """
+    Stuurt watchdog events voor een map door naar de handler van het juiste log bestand
+
+    Events voor andere bestanden in dezelfde map worden genegeerd.
+    """
+
+    def __init__(self):
+        # Wordt alleen vervangen, nooit aangepast, zodat de observer thread
+        # altijd een consistente kopie leest
+        self.handlers = {}
+
+    def add_handler(self, log_path: str, handler: LogFileHandler):
+        """
+        Registreer een handler voor een log bestand in deze map
+        """
+        key = os.path.normpath(log_path)
+        handlers = dict(self.handlers)
+        handlers[key] = handlers.get(key, ()) + (handler,)
+        self.handlers = handlers
+
+    def remove_handler(self, log_path: str, handler: LogFileHandler):
+        """
+        Verwijder een handler, geeft True terug als de map daarna leeg is
+        """
+        key = os.path.normpath(log_path)
+        handlers = dict(self.handlers)
+        remaining = tuple(h for h in handlers.get(key, ()) if h is not handler)
+        if remaining:
+            handlers[key] = remaining
+        else:
+            handlers.pop(key, None)
+        self.handlers = handlers
+        return not handlers
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._dispatch(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._dispatch(event.src_path)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            return
+        # Het log is weg geroteerd (oude bestand leeglezen) of een nieuw
+        # bestand is op de plek van het log gezet
+        self._dispatch(event.src_path)
+        self._dispatch(event.dest_path)
+
+    def _dispatch(self, path):
+        handlers = self.handlers.get(os.path.normpath(os.fsdecode(path)))
+        if handlers:
+            for handler in handlers:
+                handler.process()
+
+# Bestandssystemen waar inotify geen wijzigingen van andere machines ziet
+NETWORK_FILESYSTEMS = ('nfs', 'nfs4', 'cifs', 'smb', 'smb2', 'smb3', 'smbfs',
+                       'fuse.sshfs', 'fuse.rclone', '9p', 'afs', 'glusterfs', 'ceph')
+
+LOG_SOURCES = ('auto', 'watchdog', 'poll')
+
+def detect_log_source(log_path: str) -> str:
+    """
+    Kies 'poll' voor logs op een netwerk share en anders 'watchdog'
+
+    Leest /proc/mounts (Linux); op andere systemen wordt altijd watchdog gekozen.
+    """
+    path = os.path.realpath(log_path)
+    best_mount, best_type = '', None
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # Spaties in mount points staan als \040 in /proc/mounts
+                mount_point = fields[1].replace('\\040', ' ')
+                inside = path == mount_point or path.startswith(mount_point.rstrip('/') + '/')
+                if inside and len(mount_point) >= len(best_mount):
+                    best_mount, best_type = mount_point, fields[2]
+    except OSError:
+        return 'watchdog'
+
+    return 'poll' if best_type in NETWORK_FILESYSTEMS else 'watchdog'
+
+class LogPoller:
+    """
+    Volgt log bestanden door ze periodiek te stat'en, voor NFS/SMB mounts
+
+    Een enkele thread bedient alle bestanden. Een bestand dat groeit wordt
+    snel opnieuw bekeken, een stil bestand steeds minder vaak (exponentiele
+    backoff tot max_interval). Het totaal aantal stat calls per seconde is
+    begrensd, zodat veel bestanden niet meer CPU of netwerk kosten.
+    Wijzigingen gaan naar LogFileHandler.process, net als bij watchdog.
+    """
+
+    def __init__(self, min_interval: float = None, max_interval: float = None, max_stats_per_second: float = None):
+        self.min_interval = min_interval or float(os.getenv('LOG_POLL_MIN_INTERVAL', 0.25))
+        self.max_interval = max_interval or float(os.getenv('LOG_POLL_MAX_INTERVAL', 5))
+        self.min_gap = 1.0 / (max_stats_per_second or float(os.getenv('LOG_POLL_MAX_STATS', 200)))
+
+        self.entries = {}     # handler -> state dict
+        self.stats = {'polls': 0, 'changes': 0}
+        self._heap = []       # (volgende poll, volgnummer, state)
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def add_handler(self, handler: LogFileHandler):
+        """
+        Begin met pollen van het bestand van een handler
+        """
+        state = {'handler': handler, 'interval': self.min_interval, 'signature': self._signature(handler)}
+        with self._lock:
+            self.entries[handler] = state
+            self._schedule(state, time.monotonic())
+        self._wakeup.set()
+
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="log-poller", daemon=True)
+            self._thread.start()
+
+    def remove_handler(self, handler: LogFileHandler) -> bool:
+        """
+        Stop met pollen, geeft True terug als er daarna geen bestanden meer zijn
+        """
+        with self._lock:
+            state = self.entries.pop(handler, None)
+            if state is not None:
+                # De heap entry wordt overgeslagen zodra hij aan de beurt is
+                state['handler'] = None
+            return not self.entries
+
+    def stop(self):
+        """
+        Stop de poll thread
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @staticmethod
+    def _signature(handler: LogFileHandler):
+        try:
+            stat = os.stat(handler.tailer.path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _schedule(self, state: dict, now: float):
+        self._counter += 1
+        heapq.heappush(self._heap, (now + state['interval'], self._counter, state))
+
+    def _run(self):
+        next_slot = 0.0
+        while not self._stopping:
+            with self._lock:
+                due = self._heap[0][0] if self._heap else None
+
+            now = time.monotonic()
+            wait = None if due is None else max(due, next_slot) - now
+            if wait is None or wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+
+            with self._lock:
+                _, _, state = heapq.heappop(self._heap)
+            handler = state['handler']
+            if handler is None:
+                continue
+
+            next_slot = now + self.min_gap
+            self.stats['polls'] += 1
+            signature = self._signature(handler)
+            if signature != state['signature']:
+                # Groei, rotatie of truncatie: lezen en snel opnieuw kijken
+                state['signature'] = signature
+                state['interval'] = self.min_interval
+                self.stats['changes'] += 1
+                handler.process()
+            else:
+                state['interval'] = min(state['interval'] * 2, self.max_interval)
+
+            with self._lock:
+                if state['handler'] is not None:
+                    self._schedule(state, time.monotonic())
+
+class LogWatchers:
+    """
+    Koppelt handlers aan een gedeelde watchdog observer (een watch per map)
+    of aan de gedeelde poller, afhankelijk van de log source
+    """
+
+    def __init__(self):
+        self.observer = None
+        self.watches = {}     # map -> (watch, dispatcher)
+        self.poller = None
+
+    def add(self, log_path: str, handler: LogFileHandler, source: str):
+        """
+        Begin met volgen van een log bestand
+        """
+        if source == 'poll':
+            if self.poller is None:
+                self.poller = LogPoller()
+            self.poller.add_handler(handler)
+            return
+
+        if self.observer is None:
+            self.observer = Observer()
+            self.observer.start()
+
+        directory = os.path.dirname(log_path)
+        if directory not in self.watches:
+            dispatcher = LogDirectoryDispatcher()
+            watch = self.observer.schedule(dispatcher, directory, recursive=False)
+            self.watches[directory] = (watch, dispatcher)
+
+        self.watches[directory][1].add_handler(log_path, handler)
+
+    def remove(self, log_path: str, handler: LogFileHandler, source: str):
+        """
+        Stop met volgen, de watch verdwijnt als de map leeg is
+        """
+        if source == 'poll':
+            if self.poller is not None:
+                self.poller.remove_handler(handler)
+            return
+
+        directory = os.path.dirname(log_path)
+        if directory not in self.watches:
+            return
+
+        watch, dispatcher = self.watches[directory]
+        if dispatcher.remove_handler(log_path, handler):
+            self.observer.unschedule(watch)
+            del self.watches[directory]
+
+    def stop(self):
+        """
+        Stop de observer en poller threads (blokkerend)
+        """
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+            self.watches = {}
+
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
 
 class GameLogMonitor:
     """
     Hoofdklasse voor log monitoring
     """
 
-    def __init__(self, bot_instance):
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, bot_instance, queue_size: int = None, worker_count: int = None,
+                 overflow_policy: str = None, ingest_workers: int = None):
         self.bot = bot_instance
-        self.observers = {}
         self.active_monitors = {}
 
-    async def start_monitoring(self, server_name: str, game_type: str, log_path: str):
+        # Gedeelde watchdog observer en poller voor alle logs
+        self.watchers = LogWatchers()
+        # Optioneel: lezen en parsen in aparte processen (0 = in dit proces)
+        self.ingest_workers = ingest_workers if ingest_workers is not None else int(os.getenv('INGEST_WORKERS', 0))
+        self.ingest_pool = None
+        # Maximale tijd om een log te openen, voor hangende NFS/SMB mounts
+        self.start_timeout = float(os.getenv('LOG_START_TIMEOUT', 10))
+        self._start_lock = asyncio.Lock()
+        self.default_source = os.getenv('LOG_SOURCE', 'auto').lower()
+
+        # Begrensde queues tussen de watchdog threads en de asyncio loop. Elke
+        # server hoort bij een vaste queue met een eigen worker, zodat events
+        # van een server in volgorde afgehandeld worden (een join die op SQL
+        # wacht kan niet na de leave erna klaar zijn)
+        self.queue_size = queue_size or int(os.getenv('EVENT_QUEUE_SIZE', 1000))
+        self.worker_count = worker_count or int(os.getenv('EVENT_WORKERS', 4))
+        self.overflow_policy = (overflow_policy or os.getenv('EVENT_QUEUE_POLICY', 'block')).lower()
+        self.block_timeout = float(os.getenv('EVENT_QUEUE_BLOCK_TIMEOUT', 5))
+        # Maximale tijd om bij het afsluiten de queues leeg te werken
+        self.drain_timeout = float(os.getenv('EVENT_DRAIN_TIMEOUT', 10))
+        if self.overflow_policy not in self.OVERFLOW_POLICIES:
+            logger.warning(f"Onbekende EVENT_QUEUE_POLICY '{self.overflow_policy}', gebruik 'block'")
+            self.overflow_policy = 'block'
+
+        self.loop = None
+        self.event_queues = []
+        self.workers = []
+        self.queue_stats = {'enqueued': 0, 'processed': 0, 'dropped': 0, 'overflows': 0, 'errors': 0}
+
+        # Latency per stap van de pipeline, per server
+        self.latency = LatencyTracker()
+        # Wie er nu online is, per server
+        self.roster = PlayerRoster()
+        # Net gekickte spelers en ingeplande meldingen van hun herhaalde joins
+        self.kick_cooldown = KickCooldown()
+        self.repeat_reports = {}    # (server_name, player_name) -> ingeplande meld task
+
+    async def start(self):
+        """
+        Start de event queue en de consumer workers
+        """
+        # Servers starten tegelijk, maar de queue en workers maar een keer
+        async with self._start_lock:
+            await self._start()
+
+    async def _start(self):
+        if self.workers:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.event_queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.worker_count)]
+        self.workers = [
+            asyncio.create_task(self._event_worker(queue), name=f"log-event-worker-{i}")
+            for i, queue in enumerate(self.event_queues)
+        ]
+        logger.info(
+            f"Event queue gestart (grootte {self.queue_size}, {self.worker_count} workers, "
+            f"policy {self.overflow_policy})"
+        )
+
+        if self.ingest_workers > 0:
+            # Hier geimporteerd omdat ingest_workers zelf log_monitor importeert
+            from ingest_workers import IngestWorkerPool
+            self.ingest_pool = IngestWorkerPool(self, self.ingest_workers)
+            await self.ingest_pool.start()
+
+    async def shutdown(self):
+        """
+        Stop alle monitors, werk de queues af en stop de consumer workers
+        """
+        for server_name in list(self.active_monitors):
+            await self.stop_monitoring(server_name)
+
+        if self.ingest_pool is not None:
+            await self.ingest_pool.stop()
+            self.ingest_pool = None
+
+        await asyncio.get_running_loop().run_in_executor(None, self.watchers.stop)
+
+        # Events die al gelezen zijn eerst afhandelen: de checkpoints die
+        # hierna weggeschreven worden staan al voorbij deze events. join()
+        # wacht ook op het event dat een worker nu afhandelt, qsize() telt dat niet
+        pending = sum(queue.qsize() for queue in self.event_queues)
+        if pending:
+            logger.info(f"Wachten op {pending} events in de queue")
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self.event_queues)), self.drain_timeout
+            )
+        except asyncio.TimeoutError:
+            remaining = sum(queue.qsize() for queue in self.event_queues)
+            logger.warning(f"Event queue niet leeg na {self.drain_timeout}s, {remaining} events vervallen")
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+        await self.flush_repeat_reports()
+
+    def submit_event(self, server_name: str, event: LogEvent, trace: EventTrace = NULL_TRACE):
+        """
+        Zet een event op de queue (thread-safe, wordt aangeroepen vanuit watchdog threads)
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            self.queue_stats['dropped'] += 1
+            return
+
+        if self.overflow_policy == 'block':
+            # Backpressure: de watchdog thread wacht tot er plek is in de queue
+            future = asyncio.run_coroutine_threadsafe(self._put_blocking(server_name, event, trace), loop)
+            try:
+                future.result(timeout=self.block_timeout)
+            except Exception:
+                future.cancel()
+                loop.call_soon_threadsafe(self._count_drop)
+                logger.warning(f"[{server_name}] Event queue vol, event gedropt: {event}")
+        else:
+            loop.call_soon_threadsafe(self._enqueue, server_name, event, trace)
+
+    def _queue_for(self, server_name: str) -> asyncio.Queue:
+        """
+        De queue van een server (vast zolang het proces draait)
+        """
+        return self.event_queues[hash(server_name) % len(self.event_queues)]
+
+    async def _put_blocking(self, server_name: str, event: LogEvent, trace: EventTrace):
+        """
+        Wacht op plek in de queue (draait op de event loop)
+        """
+        queue = self._queue_for(server_name)
+        if queue.full():
+            self.queue_stats['overflows'] += 1
+        await queue.put((server_name, event, trace))
+        self.queue_stats['enqueued'] += 1
+
+    def _enqueue(self, server_name: str, event: LogEvent, trace: EventTrace):
+        """
+        Zet een event op de queue zonder te wachten (draait op de event loop)
+        """
+        item = (server_name, event, trace)
+        queue = self._queue_for(server_name)
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.queue_stats['overflows'] += 1
+            self.queue_stats['dropped'] += 1
+            if self.overflow_policy == 'drop_newest':
+                logger.warning(f"[{server_name}] Event queue vol, event gedropt: {event}")
+                return
+
+            # drop_oldest: maak plek door het oudste event weg te gooien
+            dropped_server, dropped_event, _ = queue.get_nowait()
+            queue.task_done()
+            logger.warning(f"[{dropped_server}] Event queue vol, oudste event gedropt: {dropped_event}")
+            queue.put_nowait(item)
+
+        self.queue_stats['enqueued'] += 1
+
+    def _count_drop(self):
+        """
+        Tel een gedropt event (draait op de event loop)
+        """
+        self.queue_stats['dropped'] += 1
+
+    async def _event_worker(self, queue: asyncio.Queue):
+        """
+        Consumer die de events van zijn queue een voor een afhandelt
+        """
+        while True:
+            server_name, event, trace = await queue.get()
+            try:
+                trace.mark('queue')
+                await self.handle_log_event(server_name, event, trace)
+                self.queue_stats['processed'] += 1
+            except Exception as e:
+                self.queue_stats['errors'] += 1
+                logger.error(f"Error handling log event {event} for {server_name}: {e}")
+            finally:
+                queue.task_done()
+
+    def get_queue_stats(self) -> dict:
+        """
+        Geef de huidige queue statistieken terug
+        """
+        stats = dict(self.queue_stats)
+        stats['queued'] = sum(queue.qsize() for queue in self.event_queues)
+        return stats
+
+    async def start_monitoring(self, server_name: str, game_type: str, log_path: str, source: str = None):
         """
         Start monitoring voor een specifieke server
+
+        source is 'watchdog' (inotify e.d.), 'poll' (stat polling, voor
+        NFS/SMB) of 'auto' (poll op netwerk shares, anders watchdog).
         """
-        if not os.path.exists(log_path):
-            logger.warning(f"Log bestand niet gevonden: {log_path}")
-            return False
+        await self.start()
+
+        if server_name in self.active_monitors:
+            await self.stop_monitoring(server_name)
 
+        # Alles wat het bestandssysteem raakt in een thread en met een timeout,
+        # zodat een hangende mount de andere servers niet ophoudt
+        future = self.loop.run_in_executor(None, self._open_log, server_name, game_type, log_path, source)
         try:
-            # Maak parser
-            parser = GameLogParser(game_type)
+            opened = await asyncio.wait_for(asyncio.shield(future), timeout=self.start_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[{server_name}] Log pad reageert niet binnen {self.start_timeout}s: {log_path}")
+            # De thread loopt door, een handler die later nog opent weer sluiten
+            future.add_done_callback(self._discard_opened)
+            return False
+        except Exception as e:
+            logger.error(f"Failed to start monitoring for {server_name}: {e}")
+            return False
+        if opened is None:
+            return False
 
-            # Maak handler met callback
-            handler = LogFileHandler(
-                parser, 
-                lambda event: self.handle_log_event(server_name, event)
-            )
+        log_path, source, position, parser, handler = opened
+        if handler is None:
+            # Lezen en parsen gebeurt in een worker proces
+            worker_id = self.ingest_pool.add_server(server_name, game_type, log_path, source, position)
+            self.active_monitors[server_name] = {
+                'game_type': game_type,
+                'log_path': log_path,
+                'source': source,
+                'parser': None,
+                'handler': None,
+                'worker': worker_id
+            }
+            logger.info(f"Log monitoring gestart voor {server_name} ({game_type}, {source}, worker {worker_id})")
+            return True
 
-            # Maak observer
-            observer = Observer()
-            observer.schedule(handler, os.path.dirname(log_path), recursive=False)
-            observer.start()
+        try:
+            # Registreer bij de watch voor de map van het log, of bij de poller
+            self.watchers.add(log_path, handler, source)
+
+            # Wat sinds het checkpoint (tijdens downtime) geschreven is meteen
+            # inlezen, niet pas bij de volgende regel in het log
+            read = self.loop.run_in_executor(None, handler.process)
+            try:
+                await asyncio.wait_for(asyncio.shield(read), timeout=self.start_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"[{server_name}] Inlezen vanaf het checkpoint duurt langer dan {self.start_timeout}s")
 
             # Opslaan
-            self.observers[server_name] = observer
             self.active_monitors[server_name] = {
                 'game_type': game_type,
                 'log_path': log_path,
+                'source': source,
                 'parser': parser,
                 'handler': handler
             }
 
-            logger.info(f"Log monitoring gestart voor {server_name} ({game_type})")
+            logger.info(f"Log monitoring gestart voor {server_name} ({game_type}, {source})")
             return True
 
         except Exception as e:
+            handler.close()
             logger.error(f"Failed to start monitoring for {server_name}: {e}")
             return False
 
+    @staticmethod
+    def _discard_opened(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        opened = future.result()
+        if opened is not None and opened[4] is not None:
+            opened[4].close()
+
+    def _open_log(self, server_name: str, game_type: str, log_path: str, source: str):
+        """
+        Controleer het log, kies de source en open de handler (blokkerend, draait in een thread)
+
+        Geeft (log_path, source, positie, parser, handler) terug, met parser en
+        handler None als een ingest worker het log leest, of None bij een fout.
+        """
+        if not os.path.exists(log_path):
+            logger.warning(f"Log bestand niet gevonden: {log_path}")
+            return None
+
+        source = (source or self.default_source).lower()
+        if source not in LOG_SOURCES:
+            logger.warning(f"[{server_name}] Onbekende log source '{source}', gebruik 'auto'")
+            source = 'auto'
+        if source == 'auto':
+            source = detect_log_source(log_path)
+
+        # Verder lezen vanaf het checkpoint, of aan het einde van het log beginnen
+        log_path = os.path.abspath(log_path)
+        checkpoints = self.bot.log_checkpoints
+        try:
+            position = checkpoints.resume_position(server_name, log_path)
+        except OSError as e:
+            logger.warning(f"[{server_name}] Log bestand niet leesbaar: {e}")
+            return None
+
+        if self.ingest_pool is not None:
+            return log_path, source, position, None, None
+
+        # Maak parser
+        parser = GameLogParser(game_type)
+
+        # Maak handler met callback
+        handler = LogFileHandler(
+            parser, 
+            lambda event, trace: self.submit_event(server_name, event, trace),
+            log_path,
+            position,
+            lambda checkpoint: checkpoints.update(server_name, log_path, checkpoint)
+        )
+        return log_path, source, position, parser, handler
+
     async def stop_monitoring(self, server_name: str):
         """
         Stop monitoring voor een server
         """
-        if server_name in self.observers:
-            self.observers[server_name].stop()
-            self.observers[server_name].join()
-            del self.observers[server_name]
-
         if server_name in self.active_monitors:
-            del self.active_monitors[server_name]
+            monitor = self.active_monitors.pop(server_name)
+            if monitor['handler'] is None:
+                self.ingest_pool.remove_server(server_name)
+            else:
+                self.watchers.remove(monitor['log_path'], monitor['handler'], monitor['source'])
+                monitor['handler'].close()
+            self.roster.clear(server_name)
 
         logger.info(f"Log monitoring gestopt voor {server_name}")
 
-    async def handle_log_event(self, server_name: str, event: LogEvent):
+    async def handle_log_event(self, server_name: str, event: LogEvent, trace: EventTrace = NULL_TRACE):
         """
         Handle een log event (join/leave/chat)
         """
         logger.info(f"[{server_name}] {event}")
 
-        if event.event_type == 'join':
-            await self.handle_player_join(server_name, event)
-        elif event.event_type == 'leave':
-            await self.handle_player_leave(server_name, event)
-        elif event.event_type == 'chat':
-            await self.handle_player_chat(server_name, event)
+        if event.event_type == EventTypes.JOIN:
+            await self.handle_player_join(server_name, event, trace)
+        elif event.event_type == EventTypes.LEAVE:
+            await self.handle_player_leave(server_name, event, trace)
+        elif event.event_type == EventTypes.CHAT:
+            await self.handle_player_chat(server_name, event, trace)
+        elif event.event_type == EventTypes.RESTART:
+            logger.info(f"[{server_name}] Nieuw of ingekort log, online spelers opnieuw bepalen")
+            self.roster.clear(server_name)
+
+        self.latency.finish(server_name, event, trace)
 
-    async def handle_player_join(self, server_name: str, event: LogEvent):
+    async def handle_player_join(self, server_name: str, event: LogEvent, trace: EventTrace = NULL_TRACE):
         """
         Handle speler join event
         """
         player_name = event.player_name
 
-        # Controleer of speler toegang heeft
-        has_access = await self.check_player_access(server_name, player_name, event.game_type)
+        # Dubbele join regel van een speler die al online is: niets te doen
+        if self.roster.is_duplicate_join(server_name, player_name):
+            logger.debug(f"Dubbele join genegeerd: {player_name} on {server_name}")
+            return
+
+        # Binnen de cooldown al gekickt: meteen weer kicken, zonder access check
+        repeat = self.kick_cooldown.is_denied(server_name, player_name)
+        if repeat:
+            has_access = False
+        else:
+            # Controleer of speler toegang heeft
+            has_access = await self.check_player_access(server_name, player_name, event.game_type)
+            trace.mark('access_check')
 
         if not has_access:
-            logger.warning(f"Unauthorized join attempt: {player_name} on {server_name}")
+            if not repeat:
+                logger.warning(f"Unauthorized join attempt: {player_name} on {server_name}")
 
             # Kick de speler
             success = await self.kick_player(server_name, player_name, event.game_type)
+            trace.mark('kick')
+            trace.add('join_to_kick', trace.elapsed())
+
+            if repeat and success:
+                # Alleen tellen, de telling wordt gebundeld gemeld
+                logger.info(f"Repeated join within kick cooldown: {player_name} on {server_name}")
+                self.roster.mark_offline(server_name, player_name)
+                await self.count_repeat_join(server_name, player_name)
+                trace.mark('log_action')
+                return
+
+            if success:
+                self.kick_cooldown.deny(server_name, player_name)
+            else:
+                self.kick_cooldown.forget(server_name, player_name)
 
             # Log de actie
             await self.log_action(
@@ -238,6 +1239,14 @@ class GameLogMonitor:
                 'unauthorized_join' if success else 'kick_failed',
                 'Player was kicked for unauthorized access' if success else 'Failed to kick player'
             )
+            trace.mark('log_action')
+            if success:
+                # Gekickt: een volgende join is een echte nieuwe poging
+                self.roster.mark_offline(server_name, player_name)
+            else:
+                # Kick mislukt, de speler is dus nog online; de volgende join
+                # wordt opnieuw gecontroleerd en de kick opnieuw geprobeerd
+                self.roster.mark_online(server_name, player_name, checked=False)
 
             # Stuur Discord notificatie
             await self.send_discord_notification(
@@ -245,109 +1254,206 @@ class GameLogMonitor:
                 f"🚫 **Unauthorized Access**\n"
                 f"Player: `{player_name}`\n"
                 f"Action: {'Kicked' if success else 'Kick failed'}\n"
-                f"Server: {server_name}"
+                f"Server: {server_name}",
+                kind='unauthorized_join' if success else 'kick_failed',
+                player_name=player_name
             )
+            trace.mark('notify')
         else:
             logger.info(f"Authorized join: {player_name} on {server_name}")
+            self.roster.mark_online(server_name, player_name)
             await self.log_action(server_name, player_name, 'authorized_join', 'Player joined with valid access')
+            trace.mark('log_action')
+
+    async def count_repeat_join(self, server_name: str, player_name: str):
+        """
+        Tel een herhaalde join en meld de telling als het budget van de speler het toelaat
+        """
+        key = (server_name, player_name)
+        wait = self.kick_cooldown.repeat(server_name, player_name)
+        if wait <= 0:
+            task = self.repeat_reports.pop(key, None)
+            if task is not None:
+                task.cancel()
+            await self.report_repeat_joins(server_name, player_name)
+            return
+        if key in self.repeat_reports:
+            # Er staat al een melding ingepland die deze join meeneemt
+            return
+
+        self.repeat_reports[key] = asyncio.create_task(
+            self._report_repeat_joins_later(wait, server_name, player_name),
+            name=f"repeat-report-{server_name}-{player_name}"
+        )
+
+    async def _report_repeat_joins_later(self, wait: float, server_name: str, player_name: str):
+        await asyncio.sleep(wait)
+        await self.report_repeat_joins(server_name, player_name)
+
+    async def report_repeat_joins(self, server_name: str, player_name: str):
+        """
+        Schrijf een activity rij en een notificatie voor alle opgespaarde herhaalde joins
+        """
+        self.repeat_reports.pop((server_name, player_name), None)
+        count, total = self.kick_cooldown.take_unreported(server_name, player_name)
+        if not count:
+            return
 
-    async def handle_player_leave(self, server_name: str, event: LogEvent):
+        await self.log_action(
+            server_name,
+            player_name,
+            'repeat_unauthorized_join',
+            f"Player was kicked {count}x again within the kick cooldown ({total} total)"
+        )
+        await self.send_discord_notification(
+            server_name,
+            f"🔁 **Repeated Join Attempts**\n"
+            f"Player: `{player_name}`\n"
+            f"Kicked again: {count}x ({total} total)\n"
+            f"Server: {server_name}",
+            kind='repeat_join',
+            player_name=player_name,
+            count=count
+        )
+
+    async def flush_repeat_reports(self):
+        """
+        Meld alle ingeplande tellingen meteen (bij het afsluiten)
+        """
+        tasks = list(self.repeat_reports.items())
+        for _, task in tasks:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in tasks), return_exceptions=True)
+        for key, _ in tasks:
+            await self.report_repeat_joins(*key)
+
+    async def handle_player_leave(self, server_name: str, event: LogEvent, trace: EventTrace = NULL_TRACE):
         """
         Handle speler leave event
         """
+        self.roster.mark_offline(server_name, event.player_name)
         await self.log_action(server_name, event.player_name, 'leave', 'Player left the server')
+        trace.mark('log_action')
 
-    async def handle_player_chat(self, server_name: str, event: LogEvent):
+    async def handle_player_chat(self, server_name: str, event: LogEvent, trace: EventTrace = NULL_TRACE):
         """
-        Handle chat berichten (optioneel)
+        Handle chat berichten: controleer ze op verboden termen
         """
-        # Kan gebruikt worden voor chat moderation
-        pass
+        matches = self.bot.chat_moderator.check(event.message)
+        trace.mark('chat_check')
+        if not matches:
+            return
+
+        player_name = event.player_name
+        matched = ", ".join(term for term, _ in matches)
+        terms = ", ".join(f"`{term}`" for term, _ in matches)
+        kick = any(action == 'kick' for _, action in matches)
+        logger.warning(f"Banned term in chat: {player_name} on {server_name} ({len(matches)} terms)")
+
+        if kick:
+            success = await self.kick_player(server_name, player_name, event.game_type,
+                                             reason=CHAT_KICK_REASON)
+            trace.mark('kick')
+            if success:
+                self.roster.mark_offline(server_name, player_name)
+            action = 'chat_kick' if success else 'kick_failed'
+            reason = 'Player was kicked for banned chat terms' if success else 'Failed to kick player'
+            result = 'Kicked' if success else 'Kick failed'
+        else:
+            action = 'chat_violation'
+            reason = 'Player used banned chat terms'
+            result = 'Reported'
+
+        await self.log_action(server_name, player_name, action,
+                              f"{reason}: {matched}"[:500])
+        trace.mark('log_action')
+
+        await self.send_discord_notification(
+            server_name,
+            f"💬 **Chat Violation**\n"
+            f"Player: `{player_name}`\n"
+            f"Terms: {terms}\n"
+            f"Action: {result}\n"
+            f"Server: {server_name}",
+            kind=action,
+            player_name=player_name,
+            detail=matched
+        )
+        trace.mark('notify')
 
     async def check_player_access(self, server_name: str, player_name: str, game_type: str) -> bool:
         """
         Controleer of een speler toegang heeft tot de server
         """
+        # Snelle beslissing uit het geheugen, SQL alleen bij ontbrekende of verouderde entries
+        decision = self.bot.access_index.lookup(server_name, player_name, game_type)
+        if decision is not None:
+            return decision
+
         try:
-            async with aiosqlite.connect(self.bot.db_path) as db:
-                # Zoek de Discord gebruiker op basis van game username
-                cursor = await db.execute(
-                    """SELECT u.discord_id, ga.game_username, dl.current_level, s.required_level
-                       FROM users u
-                       JOIN game_accounts ga ON u.discord_id = ga.discord_id
-                       LEFT JOIN discord_levels dl ON u.discord_id = dl.discord_id
-                       JOIN servers s ON s.server_name = ?
-                       WHERE ga.game_username = ? AND ga.game_type = ?""",
-                    (server_name, player_name, game_type)
-                )
+            # Zoek de Discord gebruiker op basis van game username
+            result = await self.bot.db.fetchone(
+                """SELECT u.discord_id, ga.game_username, dl.current_level, s.required_level
+                   FROM users u
+                   JOIN game_accounts ga ON u.discord_id = ga.discord_id
+                   LEFT JOIN discord_levels dl ON u.discord_id = dl.discord_id
+                   JOIN servers s ON s.server_name = ?
+                   WHERE ga.game_username = ? AND ga.game_type = ?""",
+                (server_name, player_name, game_type)
+            )
 
-                result = await cursor.fetchone()
+            if not result:
+                # Speler niet gevonden in database
+                return False
 
-                if not result:
-                    # Speler niet gevonden in database
-                    return False
+            discord_id, game_username, current_level, required_level = result
 
-                discord_id, game_username, current_level, required_level = result
+            # Controleer level requirement
+            if current_level is None:
+                current_level = 0
 
-                # Controleer level requirement
-                if current_level is None:
-                    current_level = 0
+            self.bot.access_index.remember(
+                server_name, player_name, game_type, discord_id, current_level, required_level
+            )
 
-                return current_level >= required_level
+            return current_level >= required_level
 
         except Exception as e:
             logger.error(f"Error checking player access: {e}")
             return False
 
-    async def kick_player(self, server_name: str, player_name: str, game_type: str) -> bool:
+    async def kick_player(self, server_name: str, player_name: str, game_type: str, reason: str = None) -> bool:
         """
         Kick een speler van de server via RCON
+
+        Zonder reason krijgt de speler de standaard melding over koppelen en level.
         """
-        # Deze functie wordt geïmplementeerd in de RCON module
-        logger.info(f"Would kick {player_name} from {server_name} (RCON not implemented yet)")
-        return True  # Tijdelijk altijd True
+        try:
+            return await self.bot.rcon_connections.kick(server_name, player_name, game_type, reason=reason)
+        except Exception as e:
+            logger.error(f"Error kicking {player_name} from {server_name}: {e}")
+            return False
 
     async def log_action(self, server_name: str, player_name: str, action: str, reason: str):
         """
-        Log een actie in de database
+        Log een actie in de database (via de write-behind buffer)
         """
         try:
-            async with aiosqlite.connect(self.bot.db_path) as db:
-                await db.execute(
-                    """INSERT INTO activity_log (server_id, action, game_username, result, reason)
-                       VALUES ((SELECT id FROM servers WHERE server_name = ?), ?, ?, 'success', ?)""",
-                    (server_name, action, player_name, reason)
-                )
-                await db.commit()
+            self.bot.activity_writer.record(server_name, player_name, action, reason)
         except Exception as e:
             logger.error(f"Error logging action: {e}")
 
-    async def send_discord_notification(self, server_name: str, message: str):
+    async def send_discord_notification(self, server_name: str, message: str, kind: str = None,
+                                        player_name: str = None, count: int = 1, detail: str = None):
         """
         Stuur een Discord notificatie
+
+        Notificaties gaan via de dispatcher van de bot, die ze per kanaal
+        bundelt en binnen de rate limits verstuurt zonder hier te wachten.
         """
         try:
-            # Zoek het juiste kanaal op
-            async with aiosqlite.connect(self.bot.db_path) as db:
-                cursor = await db.execute(
-                    "SELECT discord_channel_id FROM servers WHERE server_name = ?",
-                    (server_name,)
-                )
-                result = await cursor.fetchone()
-
-                if result and result[0]:
-                    channel_id = int(result[0])
-                    channel = self.bot.get_channel(channel_id)
-
-                    if channel:
-                        embed = discord.Embed(
-                            title=f"🎮 {server_name}",
-                            description=message,
-                            color=discord.Color.red(),
-                            timestamp=datetime.now()
-                        )
-                        await channel.send(embed=embed)
-
+            await self.bot.notifier.notify(server_name, message, kind=kind, player_name=player_name,
+                                           count=count, detail=detail)
         except Exception as e:
             logger.error(f"Error sending Discord notification: {e}")
 
@@ -0,0 +1,225 @@
+"""
+Log Replay & Backfill
+====================
+
+Verwerkt bestaande gameserver logs opnieuw, bijvoorbeeld na downtime of
+bij het toevoegen van een server. Grote bestanden worden opgeknipt in
+byte ranges die op een newline beginnen en eindigen, en parallel geparsed
+in een process pool. De events komen in de oorspronkelijke volgorde terug.
+
+Gebruik:
+    python log_replay.py /pad/naar/logs --game minecraft
+    python log_replay.py latest.log --game minecraft --output events.jsonl
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import sys
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from log_monitor import EventTypes, GameLogParser, LogEvent, intern_type
+
+logger = logging.getLogger(__name__)
+
+# Doelgrootte van een byte range per worker taak
+RANGE_SIZE = 32 * 1024 * 1024
+
+# Hoeveel gedecomprimeerde data een gzip worker per keer parsed
+GZIP_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Parsers per worker proces, zodat de regex maar een keer gecompileerd wordt
+_parsers = {}
+
+def _get_parser(game_type: str) -> GameLogParser:
+    parser = _parsers.get(game_type)
+    if parser is None:
+        parser = _parsers[game_type] = GameLogParser(game_type)
+    return parser
+
+def _natural_key(path: str):
+    """
+    Sorteer 2024-02-01-2.log.gz voor 2024-02-01-10.log.gz
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', os.path.basename(path))]
+
+def find_log_files(path: str) -> list:
+    """
+    Geef de log bestanden in chronologische volgorde terug
+
+    Bij een map komen eerst de geroteerde .log.gz archieven, daarna de
+    losse .log bestanden (zoals latest.log).
+    """
+    if not os.path.isdir(path):
+        return [path]
+
+    archives = []
+    logs = []
+    for name in os.listdir(path):
+        full_path = os.path.join(path, name)
+        if not os.path.isfile(full_path):
+            continue
+        if name.endswith('.log.gz'):
+            archives.append(full_path)
+        elif name.endswith('.log'):
+            logs.append(full_path)
+
+    return sorted(archives, key=_natural_key) + sorted(logs, key=_natural_key)
+
+def split_ranges(path: str, range_size: int = RANGE_SIZE) -> list:
+    """
+    Knip een bestand op in (start, end) byte ranges die op een newline eindigen
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    start = 0
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + range_size
+            if end >= size:
+                end = size
+            else:
+                # Schuif door naar het einde van de regel
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _compact(events) -> list:
+    """
+    Zet events om naar tuples, die goedkoper tussen processen te versturen zijn
+    """
+    return [
+        (event.event_type, event.player_name, event.timestamp, event.message)
+        for event in events
+    ]
+
+def _parse_range(task) -> list:
+    """
+    Worker: parse een byte range van een plat log bestand
+    """
+    path, game_type, start, end = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _compact(_get_parser(game_type).parse_bytes(data))
+
+def _parse_gzip(task) -> list:
+    """
+    Worker: parse een volledig gzip archief (niet op te knippen)
+    """
+    path, game_type = task
+    parser = _get_parser(game_type)
+    events = []
+    with gzip.open(path, 'rb') as f:
+        # Per blok van hele regels, zodat het archief niet in een keer in het geheugen staat
+        while True:
+            lines = f.readlines(GZIP_BLOCK_SIZE)
+            if not lines:
+                break
+            events.extend(parser.parse_bytes(b''.join(lines)))
+    return _compact(events)
+
+def _build_tasks(paths: list, game_type: str, range_size: int) -> list:
+    """
+    Maak de worker taken in chronologische volgorde
+    """
+    tasks = []
+    for path in paths:
+        if path.endswith('.gz'):
+            tasks.append((_parse_gzip, (path, game_type)))
+        else:
+            for start, end in split_ranges(path, range_size):
+                tasks.append((_parse_range, (path, game_type, start, end)))
+    return tasks
+
+async def replay_events(path: str, game_type: str, workers: int = None, range_size: int = RANGE_SIZE):
+    """
+    Async generator die alle events uit een log bestand of map oplevert, op volgorde
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = _build_tasks(find_log_files(path), game_type, range_size)
+    game_type = intern_type(game_type.lower())
+    # Strings uit een worker proces zijn kopieen, terug naar de gedeelde types
+    event_types = {event_type: event_type for event_type in EventTypes.ALL}
+    loop = asyncio.get_running_loop()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Maximaal twee taken per worker tegelijk in het geheugen
+        window = workers * 2
+        in_flight = []
+        next_task = 0
+
+        while next_task < len(tasks) or in_flight:
+            while next_task < len(tasks) and len(in_flight) < window:
+                func, args = tasks[next_task]
+                in_flight.append(loop.run_in_executor(pool, func, args))
+                next_task += 1
+
+            for event_type, player_name, timestamp, message in await in_flight.pop(0):
+                yield LogEvent(
+                    event_type=event_types.get(event_type, event_type),
+                    player_name=player_name,
+                    timestamp=timestamp,
+                    game_type=game_type,
+                    message=message
+                )
+
+async def replay_into_monitor(monitor, server_name: str, path: str, game_type: str, workers: int = None) -> int:
+    """
+    Stuur alle events uit een log door GameLogMonitor.handle_log_event
+    """
+    count = 0
+    async for event in replay_events(path, game_type, workers):
+        await monitor.handle_log_event(server_name, event)
+        count += 1
+    logger.info(f"Replay voor {server_name} klaar: {count} events verwerkt")
+    return count
+
+async def dry_run(path: str, game_type: str, workers: int = None, output=None) -> dict:
+    """
+    Parse een log zonder iets uit te voeren, alleen tellen (en optioneel wegschrijven)
+    """
+    counts = {}
+    started = time.monotonic()
+    async for event in replay_events(path, game_type, workers):
+        counts[event.event_type] = counts.get(event.event_type, 0) + 1
+        if output is not None:
+            output.write(json.dumps({
+                'event_type': event.event_type,
+                'player_name': event.player_name,
+                'timestamp': event.timestamp,
+                'extra_data': event.extra_data,
+            }) + '\n')
+
+    return {'events': counts, 'seconds': round(time.monotonic() - started, 3)}
+
+def main():
+    """
+    Command line interface voor een dry-run replay
+    """
+    parser = argparse.ArgumentParser(description="Replay bestaande gameserver logs")
+    parser.add_argument('path', help="Log bestand of map met (geroteerde) logs")
+    parser.add_argument('--game', required=True, help="Game type, bijv. minecraft")
+    parser.add_argument('--workers', type=int, default=None, help="Aantal worker processen")
+    parser.add_argument('--output', help="Schrijf gevonden events als JSON lines naar dit bestand")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        result = asyncio.run(dry_run(args.path, args.game, args.workers, output))
+    finally:
+        if output is not None:
+            output.close()
+
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Discord Notification Dispatcher
+==============================
+
+Verstuurt notificaties per Discord kanaal.
+Events die kort na elkaar binnenkomen worden samengevoegd tot een embed,
+en per kanaal wordt een rate limit budget aangehouden zodat een golf aan
+joins de Discord rate limits niet raakt.
+"""
+
+import asyncio
+import os
+import time
+import logging
+from datetime import datetime
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+class RateBudget:
+    """
+    Token bucket: maximaal `rate` berichten per `per` seconden
+    """
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    async def acquire(self):
+        """
+        Wacht tot er een token is en gebruik het
+        """
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+class NotificationDispatcher:
+    """
+    Bundelt notificaties per kanaal en verstuurt ze binnen het rate limit budget
+    """
+
+    # Hoe een soort event heet in een samenvatting
+    KIND_LABELS = {
+        'unauthorized_join': 'unauthorized joins',
+        'kick_failed': 'failed kicks',
+        'repeat_join': 'repeated join attempts',
+        'chat_violation': 'chat violations',
+        'chat_kick': 'chat kicks',
+    }
+
+    # Icoon per soort event in een samenvatting, anders 🚫
+    KIND_ICONS = {
+        'repeat_join': '🔁',
+        'chat_violation': '💬',
+        'chat_kick': '💬',
+    }
+
+    # Maximaal aantal namen in een samenvatting
+    MAX_NAMES = 20
+
+    def __init__(self, bot, window: float = None):
+        self.bot = bot
+        self.window = window if window is not None else float(os.getenv('NOTIFY_COALESCE_SECONDS', 2))
+
+        # Discord staat ~5 berichten per 5 seconden per kanaal toe, en
+        # ~50 requests per seconde in totaal
+        self.channel_rate = int(os.getenv('NOTIFY_CHANNEL_RATE', 5))
+        self.channel_per = float(os.getenv('NOTIFY_CHANNEL_PER', 5))
+        self.global_budget = RateBudget(int(os.getenv('NOTIFY_GLOBAL_RATE', 40)), 1.0)
+        # Hoe lang stop() wacht op het versturen van openstaande notificaties
+        self.stop_timeout = float(os.getenv('NOTIFY_STOP_TIMEOUT', 10))
+
+        self.channel_ids = {}   # server_name -> channel_id (of None)
+        self.channels = {}      # channel_id -> kanaal object
+        self.budgets = {}       # channel_id -> RateBudget
+        self.pending = {}       # channel_id -> lijst van notificaties
+        self.tasks = {}         # channel_id -> drain task
+
+    async def load_channels(self):
+        """
+        Laad de kanaal ids van alle servers in de cache
+        """
+        rows = await self.bot.db.fetchall("SELECT server_name, discord_channel_id FROM servers")
+        self.channel_ids = {name: int(channel_id) if channel_id else None for name, channel_id in rows}
+
+    async def warm_channels(self):
+        """
+        Haal alle kanaal objecten alvast op, zodat de eerste notificatie niet hoeft te wachten
+        """
+        channel_ids = {channel_id for channel_id in self.channel_ids.values() if channel_id}
+        results = await asyncio.gather(
+            *(self._channel(channel_id) for channel_id in channel_ids),
+            return_exceptions=True
+        )
+        for channel_id, result in zip(channel_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Discord kanaal {channel_id} niet gevonden: {result}")
+
+    async def stop(self):
+        """
+        Verstuur openstaande notificaties (maximaal NOTIFY_STOP_TIMEOUT seconden) en stop de drain tasks
+        """
+        running = [task for task in self.tasks.values() if not task.done()]
+        if running:
+            _, unfinished = await asyncio.wait(running, timeout=self.stop_timeout)
+            if unfinished:
+                logger.warning(f"Notificaties voor {len(unfinished)} kanalen niet verstuurd bij het afsluiten")
+
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks = {}
+        self.pending = {}
+
+    async def notify(self, server_name: str, message: str, kind: str = None, player_name: str = None,
+                     count: int = 1, detail: str = None):
+        """
+        Plan een notificatie in, wacht niet op het versturen
+
+        count is het aantal events dat de notificatie dekt (bijv. gebundelde
+        herhaalde joins), detail komt in een samenvatting achter de naam.
+        """
+        channel_id = await self._channel_id(server_name)
+        if not channel_id:
+            return
+
+        self.pending.setdefault(channel_id, []).append((server_name, kind, player_name, message, count, detail))
+
+        task = self.tasks.get(channel_id)
+        if task is None or task.done():
+            self.tasks[channel_id] = asyncio.create_task(
+                self._drain(channel_id), name=f"notify-{channel_id}"
+            )
+
+    async def _channel_id(self, server_name: str):
+        """
+        Zoek het kanaal id van een server op, eerst in de cache
+        """
+        if server_name not in self.channel_ids:
+            row = await self.bot.db.fetchone(
+                "SELECT discord_channel_id FROM servers WHERE server_name = ?",
+                (server_name,)
+            )
+            self.channel_ids[server_name] = int(row[0]) if row and row[0] else None
+        return self.channel_ids[server_name]
+
+    async def _channel(self, channel_id: int):
+        """
+        Haal het kanaal object op, eerst uit de cache
+        """
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                channel = await self.bot.fetch_channel(channel_id)
+            self.channels[channel_id] = channel
+        return channel
+
+    async def _drain(self, channel_id: int):
+        """
+        Verzamel notificaties gedurende het window en verstuur ze gebundeld
+        """
+        budget = self.budgets.get(channel_id)
+        if budget is None:
+            budget = self.budgets[channel_id] = RateBudget(self.channel_rate, self.channel_per)
+
+        await asyncio.sleep(self.window)
+
+        while self.pending.get(channel_id):
+            # Terwijl we op budget wachten komen er mogelijk nog meer bij
+            await budget.acquire()
+            await self.global_budget.acquire()
+            batch = self.pending.pop(channel_id)
+
+            try:
+                channel = await self._channel(channel_id)
+                await channel.send(embed=self._build_embed(batch))
+            except discord.NotFound:
+                logger.error(f"Discord kanaal {channel_id} niet gevonden, notificaties vervallen")
+                self.channels.pop(channel_id, None)
+            except Exception as e:
+                logger.error(f"Error sending Discord notification: {e}")
+
+    def _build_embed(self, batch: list) -> discord.Embed:
+        """
+        Maak een embed voor een enkele notificatie of een samenvatting
+        """
+        servers = sorted({item[0] for item in batch})
+        title = f"🎮 {servers[0]}" if len(servers) == 1 else f"🎮 {', '.join(servers)}"
+
+        if len(batch) == 1:
+            description = batch[0][3]
+        else:
+            description = "\n".join(self._summarize(batch))
+
+        return discord.Embed(
+            title=title[:256],
+            description=description[:4096],
+            color=discord.Color.red(),
+            timestamp=datetime.now()
+        )
+
+    def _summarize(self, batch: list) -> list:
+        """
+        Vat een batch samen per soort event, bijv. "7 unauthorized joins: a, b, c…"
+        """
+        groups = {}     # kind -> [totaal aantal, {naam: [details]}]
+        loose_messages = []
+        for server_name, kind, player_name, message, count, detail in batch:
+            if kind is None:
+                loose_messages.append(message)
+                continue
+            group = groups.get(kind)
+            if group is None:
+                group = groups[kind] = [0, {}]
+            group[0] += count
+            if player_name:
+                details = group[1].setdefault(player_name, [])
+                if detail and detail not in details:
+                    details.append(detail)
+
+        lines = []
+        for kind, (total, players) in groups.items():
+            label = self.KIND_LABELS.get(kind, kind.replace('_', ' '))
+            icon = self.KIND_ICONS.get(kind, '🚫')
+            names = list(players.items())
+            shown = ", ".join(
+                f"`{name}` ({'; '.join(details)})" if details else f"`{name}`"
+                for name, details in names[:self.MAX_NAMES]
+            )
+            if len(names) > self.MAX_NAMES:
+                shown += f"… (+{len(names) - self.MAX_NAMES})"
+            lines.append(f"{icon} **{total} {label}**: {shown}")
+
+        lines.extend(loose_messages)
+        return lines
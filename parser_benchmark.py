@@ -0,0 +1,290 @@
+"""
+Parser Benchmark
+===============
+
+Microbenchmarks voor GameLogParser en LogFileHandler met synthetische,
+deterministische logs voor elke game in GameLogPatterns.
+Resultaten worden als JSON geschreven zodat runs met elkaar vergeleken
+kunnen worden.
+
+Gebruik:
+    python parser_benchmark.py --output before.json
+    python parser_benchmark.py --compare before.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from log_monitor import GameLogPatterns, GameLogParser, LogFileHandler
+
+# Log regels per game: (join, leave, chat, ruis). Ruis regels lijken op wat
+# een echte server schrijft, zodat de prefilter realistisch belast wordt.
+TEMPLATES = {
+    'minecraft': {
+        'join': "[{time}] [Server thread/INFO]: {player} joined the game",
+        'leave': "[{time}] [Server thread/INFO]: {player} left the game",
+        'chat': "[{time}] [Async Chat Thread - #0/INFO]: <{player}> {message}",
+        'noise': [
+            "[{time}] [Server thread/INFO]: Saving chunks for level 'ServerLevel[world]'/minecraft:overworld",
+            "[{time}] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running {n}ms or {n} ticks behind",
+            "[{time}] [Server thread/INFO]: {player} has made the advancement [Stone Age]",
+            "[{time}] [Worker-Main-{n}/DEBUG]: Loaded chunk [{n}, {n}] in {n}ms",
+            "[{time}] [User Authenticator #{n}/INFO]: UUID of player {player} is 069a79f4-44e9-4726-a5be-fca90e38aaf5",
+        ],
+    },
+    'palworld': {
+        'join': "[{date} {time}] [LOG] PlayerConnected: {player} (ID:{n})",
+        'leave': "[{date} {time}] [LOG] PlayerDisconnected: {player}",
+        'chat': "[{date} {time}] [CHAT] PlayerChat: {player}: {message}",
+        'noise': [
+            "[{date} {time}] [LOG] Tick rate {n} fps, {n} actors",
+            "[{date} {time}] [LOG] Saving world data ({n} bytes)",
+            "[{date} {time}] [WARN] Base camp {n} workers idle",
+        ],
+    },
+    'beamng': {
+        'join': "[{date} {time}] [INFO] [CONNECT] {player} (IP: 192.168.1.{n})",
+        'leave': "[{date} {time}] [INFO] [DISCONNECT] {player}",
+        'chat': "[{date} {time}] [INFO] [CHAT] {player}: {message}",
+        'noise': [
+            "[{date} {time}] [DEBUG] Vehicle {n} position sync",
+            "[{date} {time}] [INFO] Heartbeat sent to backend ({n}ms)",
+            "[{date} {time}] [DEBUG] Resource check for client {n}",
+        ],
+    },
+    'valheim': {
+        'join': "[{date} {time}] Got character ZDOID from {player} : {n}:1",
+        'leave': "[{date} {time}] Closing socket {player}",
+        'chat': "[{date} {time}] Say: {player}: {message}",
+        'noise': [
+            "[{date} {time}] Connections {n} ZDOS:{n}  sent:{n} recv:{n}",
+            "[{date} {time}] Dungeon loaded {n} rooms",
+            "[{date} {time}] World saved ( {n}ms )",
+        ],
+    },
+    'ark': {
+        'join': "[{date} {time}] {player} joined the ARK",
+        'leave': "[{date} {time}] {player} left the ARK",
+        'chat': "[{date} {time}] {player}: {message}",
+        'noise': [
+            "[{date} {time}] Saving world ({n} structures)",
+            "[{date} {time}] Tribe {n} tamed a Raptor - Lvl {n}",
+            "[{date} {time}] Wild dino count {n}",
+        ],
+    },
+}
+
+MESSAGES = ["hoi allemaal", "wie wil er mee naar de nether?", "gg", "lag?", "brb eten"]
+
+def generate_log_lines(game_type: str, count: int, event_ratio: float = 0.05, seed: int = 42) -> list:
+    """
+    Genereer `count` deterministische log regels, waarvan ~event_ratio events
+    """
+    templates = TEMPLATES[game_type]
+    rng = random.Random(seed)
+    players = [f"Player{i}" for i in range(200)]
+    event_types = ('join', 'leave', 'chat')
+
+    lines = []
+    for i in range(count):
+        seconds = i // 10
+        values = {
+            'date': "2024-02-01",
+            'time': f"{seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+            'player': rng.choice(players),
+            'message': rng.choice(MESSAGES),
+            'n': rng.randint(1, 9999),
+        }
+        if rng.random() < event_ratio:
+            template = templates[rng.choice(event_types)]
+        else:
+            template = rng.choice(templates['noise'])
+        lines.append(template.format(**values))
+    return lines
+
+def _timed(func, repeat: int) -> float:
+    """
+    Beste tijd van `repeat` runs, zonder garbage collection tijdens het meten
+    """
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return best
+
+def bench_parser(game_type: str, lines: list, repeat: int) -> dict:
+    """
+    Meet parse_line per regel, de batch API en het bytes pad
+
+    decode_parse is het oude pad van de handler (alles decoderen en dan
+    parse_lines), parse_bytes het huidige.
+    """
+    parser = GameLogParser(game_type)
+    events = parser.parse_lines(lines)
+
+    def per_line():
+        parse_line = parser.parse_line
+        for line in lines:
+            parse_line(line)
+
+    data = ("\n".join(lines) + "\n").encode('utf-8')
+
+    line_seconds = _timed(per_line, repeat)
+    batch_seconds = _timed(lambda: parser.parse_lines(lines), repeat)
+    decode_seconds = _timed(lambda: parser.parse_lines(data.decode('utf-8').split('\n')), repeat)
+    bytes_seconds = _timed(lambda: parser.parse_bytes(data), repeat)
+
+    return {
+        'lines': len(lines),
+        'events': len(events),
+        'parse_line_lines_per_sec': round(len(lines) / line_seconds),
+        'parse_line_events_per_sec': round(len(events) / line_seconds),
+        'parse_lines_lines_per_sec': round(len(lines) / batch_seconds),
+        'parse_lines_events_per_sec': round(len(events) / batch_seconds),
+        'decode_parse_lines_per_sec': round(len(lines) / decode_seconds),
+        'parse_bytes_lines_per_sec': round(len(lines) / bytes_seconds),
+    }
+
+def bench_allocations(game_type: str, lines: list) -> dict:
+    """
+    Meet geheugen en allocaties per LogEvent voor regels die allemaal matchen
+    """
+    parser = GameLogParser(game_type)
+    event_lines = [line for line in lines if parser.parse_line(line) is not None]
+    if not event_lines:
+        return {}
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    events = parser.parse_lines(event_lines)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    return {
+        'events': len(events),
+        'bytes_per_event': round(size / len(events), 1),
+        'allocations_per_event': round(blocks / len(events), 2),
+    }
+
+def bench_handler(game_type: str, lines: list, chunk_lines: int = 500) -> dict:
+    """
+    Meet LogFileHandler die aangevulde chunks uit een bestand leest en parsed
+    """
+    directory = tempfile.mkdtemp(prefix='parser-bench-')
+    log_path = os.path.join(directory, 'latest.log')
+    open(log_path, 'w').close()
+
+    data = [
+        ("\n".join(lines[i:i + chunk_lines]) + "\n").encode('utf-8')
+        for i in range(0, len(lines), chunk_lines)
+    ]
+    received = []
+    handler = LogFileHandler(GameLogParser(game_type), lambda event, trace: received.append(event), log_path)
+
+    try:
+        elapsed = 0.0
+        with open(log_path, 'ab', buffering=0) as f:
+            for chunk in data:
+                f.write(chunk)
+                started = time.perf_counter()
+                handler.process()
+                elapsed += time.perf_counter() - started
+    finally:
+        handler.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        'chunks': len(data),
+        'chunk_lines': chunk_lines,
+        'events': len(received),
+        'lines_per_sec': round(len(lines) / elapsed),
+        'usec_per_chunk': round(elapsed / len(data) * 1e6, 1),
+    }
+
+def run_benchmarks(line_count: int, repeat: int, event_ratio: float, games: list) -> dict:
+    """
+    Draai alle benchmarks en geef de resultaten als dict terug
+    """
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'lines': line_count,
+            'event_ratio': event_ratio,
+            'repeat': repeat,
+        },
+        'games': {},
+    }
+
+    for game_type in games:
+        lines = generate_log_lines(game_type, line_count, event_ratio)
+        results['games'][game_type] = {
+            'parser': bench_parser(game_type, lines, repeat),
+            'allocations': bench_allocations(game_type, lines),
+            'handler': bench_handler(game_type, lines),
+        }
+    return results
+
+def compare(baseline: dict, current: dict) -> list:
+    """
+    Vergelijk twee runs, geeft regels met de verhouding per metriek terug
+    """
+    lines = []
+    for game_type, sections in current['games'].items():
+        for section, metrics in sections.items():
+            old_metrics = baseline.get('games', {}).get(game_type, {}).get(section, {})
+            for name, value in metrics.items():
+                old = old_metrics.get(name)
+                if not isinstance(value, (int, float)) or not old:
+                    continue
+                lines.append(f"{game_type:10} {section:12} {name:28} {old:>12} -> {value:>12}  x{value / old:.2f}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gameserver log parser")
+    parser.add_argument('--lines', type=int, default=200000, help="Aantal log regels per game")
+    parser.add_argument('--repeat', type=int, default=3, help="Aantal herhalingen (beste tijd telt)")
+    parser.add_argument('--event-ratio', type=float, default=0.05, help="Fractie regels die een event zijn")
+    parser.add_argument('--games', nargs='*', default=list(TEMPLATES), help="Games om te benchmarken")
+    parser.add_argument('--output', help="Schrijf de resultaten als JSON naar dit bestand")
+    parser.add_argument('--compare', help="Vergelijk met een eerder opgeslagen JSON resultaat")
+    args = parser.parse_args()
+
+    missing = [game for game in args.games if not hasattr(GameLogPatterns, game.upper())]
+    if missing:
+        parser.error(f"Onbekende games: {', '.join(missing)}")
+
+    results = run_benchmarks(args.lines, args.repeat, args.event_ratio, args.games)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, results)))
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Player Roster
+============
+
+Live lijst van online spelers per server, bijgehouden vanuit de join en
+leave events van de log monitor. Dubbele join regels (Valheim logt bij elke
+respawn opnieuw "Got character ZDOID from ...") worden herkend, zodat ze de
+database en RCON niet opnieuw raken.
+
+Een leave regel kan ontbreken (crash van de gameserver, Valheim logt de naam
+niet bij het verlaten), dus "online" is geen vrijbrief: na
+ROSTER_RECHECK_SECONDS, een level wijziging of een herstart van de server
+wordt een join weer gewoon gecontroleerd.
+"""
+
+import os
+import time
+
+class PlayerRoster:
+    """
+    Online spelers per server, met debounce van dubbele joins
+    """
+
+    def __init__(self, debounce_seconds: float = None):
+        self.debounce = debounce_seconds if debounce_seconds is not None else float(
+            os.getenv('JOIN_DEBOUNCE_SECONDS', 5)
+        )
+        self.recheck = float(os.getenv('ROSTER_RECHECK_SECONDS', 300))
+        self.online = {}          # server_name -> {player_name: online sinds (epoch)}
+        self.checked = {}         # (server_name, player_name) -> monotonic tijd van de laatste access check
+        self.recent_joins = {}    # (server_name, player_name) -> monotonic tijd van de laatste join
+        self.duplicates = 0
+
+    def is_duplicate_join(self, server_name: str, player_name: str) -> bool:
+        """
+        True als de speler net gecontroleerd is en online is, of net een join had
+
+        Een nieuwe join wordt meteen geregistreerd, zodat een tweede regel kort
+        daarna ook als dubbel telt.
+        """
+        key = (server_name, player_name)
+        now = time.monotonic()
+        if player_name in self.online.get(server_name, ()) and now - self.checked.get(key, 0.0) < self.recheck:
+            self.duplicates += 1
+            return True
+
+        last = self.recent_joins.get(key)
+        if last is not None and now - last < self.debounce:
+            self.duplicates += 1
+            return True
+
+        self.recent_joins[key] = now
+        if len(self.recent_joins) > 1000:
+            self._prune(now)
+        return False
+
+    def mark_online(self, server_name: str, player_name: str, checked: bool = True):
+        """
+        Speler is online, net na een access check
+
+        Met checked=False (kick mislukt) is de speler online maar niet
+        toegelaten: een volgende join wordt dan gewoon weer gecontroleerd.
+        """
+        players = self.online.get(server_name)
+        if players is None:
+            players = self.online[server_name] = {}
+        players.setdefault(player_name, time.time())
+        if checked:
+            self.checked[(server_name, player_name)] = time.monotonic()
+        else:
+            self.checked.pop((server_name, player_name), None)
+
+    def mark_offline(self, server_name: str, player_name: str):
+        players = self.online.get(server_name)
+        if players is not None:
+            players.pop(player_name, None)
+        self.checked.pop((server_name, player_name), None)
+        self.recent_joins.pop((server_name, player_name), None)
+
+    def expire_player(self, player_name: str):
+        """
+        Laat de volgende join van een speler weer controleren (bijv. na een level wijziging)
+        """
+        for key in [key for key in self.checked if key[1] == player_name]:
+            del self.checked[key]
+
+    def clear(self, server_name: str):
+        """
+        Vergeet alle spelers van een server (monitor gestopt of server herstart)
+        """
+        self.online.pop(server_name, None)
+        for table in (self.checked, self.recent_joins):
+            for key in [key for key in table if key[0] == server_name]:
+                del table[key]
+
+    def players(self, server_name: str) -> dict:
+        """
+        Online spelers van een server met het tijdstip sinds wanneer
+        """
+        return self.online.get(server_name, {})
+
+    def _prune(self, now: float):
+        expired = [key for key, last in self.recent_joins.items() if now - last >= self.debounce]
+        for key in expired:
+            del self.recent_joins[key]
@@ -0,0 +1,520 @@
+"""
+Async RCON Client
+================
+
+Native asyncio implementatie van het Source RCON protocol (Minecraft,
+Palworld en andere servers die RCON spreken).
+Per server blijft een geauthenticeerde connectie open; commando's worden
+met request ids gepipelined zodat meerdere kicks tegelijk kunnen lopen.
+"""
+
+import asyncio
+import itertools
+import os
+import struct
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Packet types uit het Source RCON protocol
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+class RconError(Exception):
+    """
+    Fout bij het praten met een RCON server
+    """
+
+class RconAuthError(RconError):
+    """
+    RCON server heeft het wachtwoord geweigerd
+    """
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    """
+    Bouw een RCON packet: lengte, id, type, body en twee null bytes
+    """
+    payload = struct.pack('<ii', request_id, packet_type) + body.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(payload)) + payload
+
+async def read_packet(reader: asyncio.StreamReader):
+    """
+    Lees een RCON packet, geeft (id, type, body) terug
+    """
+    header = await reader.readexactly(4)
+    (length,) = struct.unpack('<i', header)
+    if length < 10 or length > 65536:
+        raise RconError(f"Ongeldige RCON packet lengte: {length}")
+    payload = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack('<ii', payload[:8])
+    body = payload[8:-2].decode('utf-8', errors='replace')
+    return request_id, packet_type, body
+
+class RconClient:
+    """
+    Een persistente RCON connectie naar een server
+    """
+
+    def __init__(self, host: str, port: int, password: str, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._auth_id = None
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        """
+        Maak verbinding en authenticeer
+        """
+        async with self._connect_lock:
+            if self.connected:
+                return
+
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout=self.timeout
+            )
+            self._read_task = asyncio.create_task(self._read_loop(), name=f"rcon-{self.host}:{self.port}")
+
+            try:
+                self._auth_id = next(self._ids)
+                await asyncio.wait_for(
+                    self._send(self._auth_id, SERVERDATA_AUTH, self.password), timeout=self.timeout
+                )
+            except BaseException:
+                await self.close()
+                raise
+
+    async def command(self, command: str, timeout: float = None) -> str:
+        """
+        Voer een commando uit en geef het antwoord van de server terug
+        """
+        if not self.connected:
+            await self.connect()
+        return await asyncio.wait_for(
+            self._send(next(self._ids), SERVERDATA_EXECCOMMAND, command),
+            timeout=timeout or self.timeout
+        )
+
+    async def close(self):
+        """
+        Sluit de connectie, openstaande commando's falen
+        """
+        if self._read_task is not None:
+            self._read_task.cancel()
+            await asyncio.gather(self._read_task, return_exceptions=True)
+            self._read_task = None
+
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+
+        self._fail_pending(RconError("RCON connectie gesloten"))
+
+    async def _send(self, request_id: int, packet_type: int, body: str) -> str:
+        """
+        Verstuur een packet en wacht op het antwoord met hetzelfde id
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(encode_packet(request_id, packet_type, body))
+            await self._writer.drain()
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_loop(self):
+        """
+        Lees antwoorden en koppel ze aan het wachtende commando
+        """
+        try:
+            while True:
+                request_id, packet_type, body = await read_packet(self._reader)
+
+                if request_id == -1 and self._auth_id in self._pending:
+                    # Id -1 is het antwoord op een geweigerde authenticatie
+                    self._resolve(self._auth_id, exception=RconAuthError("RCON wachtwoord geweigerd"))
+                elif request_id == self._auth_id:
+                    # Sommige servers sturen eerst een lege RESPONSE_VALUE
+                    if packet_type == SERVERDATA_AUTH_RESPONSE:
+                        self._resolve(request_id, result=body)
+                else:
+                    self._resolve(request_id, result=body)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._fail_pending(RconError(f"RCON connectie verbroken: {e}"))
+
+    def _resolve(self, request_id: int, result: str = None, exception: Exception = None):
+        future = self._pending.get(request_id)
+        if future is None or future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _fail_pending(self, exception: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exception)
+        self._pending.clear()
+
+class RconPool:
+    """
+    Houdt per server een RCON connectie open, met reconnect en backoff
+    """
+
+    # Kick commando per game, player is al gevalideerd door de log patterns
+    KICK_COMMANDS = {
+        'minecraft': 'kick {player} {reason}',
+        'palworld': 'KickPlayer {player}',
+        'beamng': 'kick {player} {reason}',
+    }
+
+    # Games waarvan het kick commando een id nodig heeft in plaats van de naam
+    # uit het log: commando dat de spelerslijst geeft, en de kolom met het id
+    PLAYER_ID_LOOKUPS = {
+        'palworld': ('ShowPlayers', 'steamid'),
+    }
+
+    # Antwoorden die betekenen dat de kick niet gelukt is (kleine letters)
+    KICK_FAILURES = (
+        'no player was found',
+        'cannot be found',
+        'not found',
+        'unknown or incomplete command',
+        'unknown command',
+        'incorrect argument',
+        'failed',
+        'error',
+    )
+
+    DEFAULT_KICK_REASON = 'Geen toegang: koppel je account en haal het vereiste Discord level'
+
+    def __init__(self, db, timeout: float = None):
+        self.db = db
+        self.timeout = timeout or float(os.getenv('RCON_TIMEOUT', 5))
+        self.backoff_base = float(os.getenv('RCON_BACKOFF_BASE', 1))
+        self.backoff_max = float(os.getenv('RCON_BACKOFF_MAX', 60))
+
+        self.configs = {}     # server_name -> (game_type, host, port, password)
+        self.clients = {}     # server_name -> RconClient
+        self._failures = {}   # server_name -> (aantal mislukte pogingen, volgende poging)
+
+    async def load(self):
+        """
+        Laad de RCON configuratie van alle actieve servers
+        """
+        rows = await self.db.fetchall(
+            """SELECT server_name, game_type, rcon_host, rcon_port, rcon_password
+               FROM servers WHERE active"""
+        )
+        self.configs = {}
+        for server_name, game_type, host, port, password in rows:
+            self.set_server(server_name, game_type, host, port, password)
+
+    def set_server(self, server_name: str, game_type: str, host: str, port: int, password: str):
+        """
+        Registreer de RCON gegevens van een server
+
+        Ontbrekende waardes komen uit de .env (bijv. MINECRAFT_RCON_PASSWORD).
+        """
+        prefix = game_type.upper()
+        host = host or os.getenv(f'{prefix}_RCON_HOST', 'localhost')
+        port = port or os.getenv(f'{prefix}_RCON_PORT')
+        password = password or os.getenv(f'{prefix}_RCON_PASSWORD')
+        if not port or not password:
+            logger.warning(f"Geen RCON configuratie voor {server_name}, kicken is niet mogelijk")
+            self.configs.pop(server_name, None)
+            return
+
+        config = (game_type.lower(), host, int(port), password)
+        if self.configs.get(server_name) != config and server_name in self.clients:
+            # Gegevens gewijzigd, oude connectie wordt bij de volgende aanroep vervangen
+            asyncio.ensure_future(self.clients.pop(server_name).close())
+        self.configs[server_name] = config
+
+    async def get_client(self, server_name: str) -> RconClient:
+        """
+        Geef een verbonden client terug, maak zo nodig (opnieuw) verbinding
+        """
+        client = self.clients.get(server_name)
+        if client is not None and client.connected:
+            return client
+
+        if server_name not in self.configs:
+            raise RconError(f"Geen RCON configuratie voor {server_name}")
+
+        failures, next_attempt = self._failures.get(server_name, (0, 0.0))
+        if time.monotonic() < next_attempt:
+            raise RconError(f"RCON voor {server_name} in backoff na {failures} mislukte pogingen")
+
+        game_type, host, port, password = self.configs[server_name]
+        if client is None:
+            client = self.clients[server_name] = RconClient(host, port, password, self.timeout)
+
+        try:
+            await client.connect()
+        except Exception as e:
+            failures += 1
+            delay = min(self.backoff_base * 2 ** (failures - 1), self.backoff_max)
+            self._failures[server_name] = (failures, time.monotonic() + delay)
+            raise RconError(f"RCON verbinding met {server_name} mislukt: {e}") from e
+
+        self._failures.pop(server_name, None)
+        logger.info(f"RCON verbonden met {server_name} ({host}:{port})")
+        return client
+
+    async def command(self, server_name: str, command: str) -> str:
+        """
+        Voer een commando uit, met een nieuwe poging als de connectie weg was
+        """
+        client = await self.get_client(server_name)
+        try:
+            return await client.command(command)
+        except RconAuthError:
+            raise
+        except RconError:
+            # Connectie verbroken terwijl we wachtten, een keer opnieuw proberen
+            client = await self.get_client(server_name)
+            return await client.command(command)
+
+    async def kick(self, server_name: str, player_name: str, game_type: str, reason: str = None) -> bool:
+        """
+        Kick een speler, geeft True terug als de server de kick bevestigt
+        """
+        game_type = game_type.lower()
+        template = self.KICK_COMMANDS.get(game_type)
+        if template is None:
+            logger.warning(f"Geen kick commando bekend voor {game_type}")
+            return False
+
+        try:
+            target = player_name
+            if game_type in self.PLAYER_ID_LOOKUPS:
+                target = await self.player_id(server_name, player_name, game_type)
+                if target is None:
+                    logger.error(f"Kick van {player_name} op {server_name} mislukt: speler niet in de spelerslijst")
+                    return False
+
+            command = template.format(player=target, reason=reason or self.DEFAULT_KICK_REASON)
+            response = await self.command(server_name, command)
+        except (RconError, asyncio.TimeoutError, OSError) as e:
+            logger.error(f"Kick van {player_name} op {server_name} mislukt: {e}")
+            return False
+
+        # Naam en id zelf niet meetellen, een speler kan "ErrorKing" heten
+        lowered = response.lower().replace(player_name.lower(), '').replace(target.lower(), '')
+        if any(failure in lowered for failure in self.KICK_FAILURES):
+            logger.error(f"Kick van {player_name} op {server_name} geweigerd: {response}")
+            return False
+
+        logger.info(f"Kicked {player_name} from {server_name}: {response}")
+        return True
+
+    async def player_id(self, server_name: str, player_name: str, game_type: str):
+        """
+        Zoek het id van een online speler op in de spelerslijst (CSV met een header)
+        """
+        command, column = self.PLAYER_ID_LOOKUPS[game_type]
+        response = await self.command(server_name, command)
+        lines = [line.strip() for line in response.splitlines() if line.strip()]
+        if not lines:
+            return None
+
+        header = [name.strip().lower() for name in lines[0].split(',')]
+        if 'name' not in header or column not in header:
+            raise RconError(f"Onverwacht antwoord op {command}: {lines[0]}")
+        name_index = header.index('name')
+        id_index = header.index(column)
+        for line in lines[1:]:
+            fields = line.split(',')
+            if len(fields) > max(name_index, id_index) and fields[name_index].strip() == player_name:
+                return fields[id_index].strip()
+        return None
+
+    async def connect_all(self):
+        """
+        Maak alvast verbinding met alle servers (fouten worden alleen gelogd)
+        """
+        results = await asyncio.gather(
+            *(self.get_client(server_name) for server_name in self.configs),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(str(result))
+
+    async def close(self):
+        """
+        Sluit alle connecties
+        """
+        await asyncio.gather(*(client.close() for client in self.clients.values()), return_exceptions=True)
+        self.clients = {}
+
+class LocalRconServer:
+    """
+    Lokale RCON server voor tests, onthoudt alle ontvangen commando's
+    """
+
+    def __init__(self, password: str = 'test', host: str = '127.0.0.1', port: int = 0):
+        self.password = password
+        self.host = host
+        self.port = port
+        self.commands = []
+        self.responses = {}   # commando prefix -> antwoord
+        self.delay = 0.0      # kunstmatige vertraging per antwoord
+        self.delays = {}      # commando prefix -> eigen vertraging
+        self._server = None
+        self._connections = {}  # handler task -> writer
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def drop_connections(self):
+        """
+        Verbreek alle open connecties, de server blijft luisteren
+        """
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        authenticated = False
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_id, packet_type, body = await read_packet(reader)
+                if packet_type == SERVERDATA_AUTH:
+                    authenticated = body == self.password
+                    # Zoals Source servers: eerst een lege response, dan het auth resultaat
+                    writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, ''))
+                    writer.write(encode_packet(request_id if authenticated else -1, SERVERDATA_AUTH_RESPONSE, ''))
+                elif authenticated:
+                    self.commands.append(body)
+                    asyncio.ensure_future(self._respond(writer, request_id, body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, request_id: int, body: str):
+        delay = next((d for prefix, d in self.delays.items() if body.startswith(prefix)), self.delay)
+        if delay:
+            await asyncio.sleep(delay)
+        response = next((r for prefix, r in self.responses.items() if body.startswith(prefix)), f"OK {body}")
+        writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, response))
+        await writer.drain()
+
+# Test functie
+async def test_rcon():
+    """
+    Test de RCON client en pool tegen de lokale server
+    """
+    server = LocalRconServer(password='secret')
+    await server.start()
+
+    # Pipelining: antwoorden komen in omgekeerde volgorde binnen maar horen bij het juiste commando
+    client = RconClient('127.0.0.1', server.port, 'secret', timeout=2)
+    for i in range(5):
+        server.delays[f"list {i}"] = 0.05 * (5 - i)
+    results = await asyncio.gather(*(client.command(f"list {i}") for i in range(5)))
+    assert results == [f"OK list {i}" for i in range(5)], results
+    assert server.commands == [f"list {i}" for i in range(5)], server.commands
+
+    # Timeout
+    server.delays['slow'] = 1.0
+    try:
+        await client.command('slow', timeout=0.1)
+        raise AssertionError("slow commando had moeten time-outen")
+    except asyncio.TimeoutError:
+        pass
+    await client.close()
+
+    # Verkeerd wachtwoord
+    bad_client = RconClient('127.0.0.1', server.port, 'wrong', timeout=2)
+    try:
+        await bad_client.connect()
+        raise AssertionError("authenticatie had moeten falen")
+    except RconAuthError:
+        pass
+    await bad_client.close()
+
+    pool = RconPool(db=None, timeout=2)
+    pool.set_server('mc', 'minecraft', '127.0.0.1', server.port, 'secret')
+    pool.set_server('pw', 'palworld', '127.0.0.1', server.port, 'secret')
+
+    # Kick resultaat komt uit het antwoord van de server
+    server.responses['kick Steve'] = 'Kicked Steve: Geen toegang'
+    server.responses['kick Ghost'] = 'No player was found'
+    assert await pool.kick('mc', 'Steve', 'minecraft') is True
+    assert await pool.kick('mc', 'Ghost', 'minecraft') is False
+    server.responses['kick ErrorKing'] = 'Kicked ErrorKing: Geen toegang'
+    assert await pool.kick('mc', 'ErrorKing', 'minecraft') is True
+
+    # Reconnect: de connectie valt weg, het volgende commando verbindt opnieuw
+    await server.drop_connections()
+    await asyncio.sleep(0.05)
+    assert await pool.kick('mc', 'Steve', 'minecraft') is True
+
+    # Palworld kickt op SteamID uit ShowPlayers
+    server.responses['ShowPlayers'] = 'name,playeruid,steamid\nBob,1234,76561198000000001\n'
+    server.responses['KickPlayer'] = 'Kicked: Bob'
+    assert await pool.kick('pw', 'Bob', 'palworld') is True
+    assert server.commands[-1] == 'KickPlayer 76561198000000001', server.commands[-1]
+    assert await pool.kick('pw', 'Nobody', 'palworld') is False
+    assert server.commands[-1] == 'ShowPlayers', server.commands[-1]
+
+    await pool.close()
+    await server.stop()
+
+    # Backoff: na een mislukte verbinding wordt niet meteen opnieuw geprobeerd
+    pool = RconPool(db=None, timeout=1)
+    pool.set_server('down', 'minecraft', '127.0.0.1', server.port, 'secret')
+    for expected in ("mislukt", "backoff"):
+        try:
+            await pool.get_client('down')
+            raise AssertionError("verbinding had moeten falen")
+        except RconError as e:
+            assert expected in str(e), e
+    assert await pool.kick('down', 'Steve', 'minecraft') is False
+    await pool.close()
+
+    print("RCON tests geslaagd")
+
+if __name__ == "__main__":
+    asyncio.run(test_rcon())